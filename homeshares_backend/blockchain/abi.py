@@ -0,0 +1,18 @@
+# homeshares_backend/blockchain/abi.py
+import json
+from functools import lru_cache
+from django.conf import settings
+
+
+@lru_cache(maxsize=None)
+def load_crowdfund_abi():
+    """PropertyCrowdfund ABI (plain list or Hardhat artifact), read once per process."""
+    with open(settings.BASE_DIR / 'blockchain' / 'abi' / 'PropertyCrowdfund.json') as f:
+        data = json.load(f)
+    return data.get('abi', data) if isinstance(data, dict) else data
+
+
+@lru_cache(maxsize=None)
+def crowdfund_abi_json():
+    """The ABI serialized for templates (data-abi attributes)."""
+    return json.dumps(load_crowdfund_abi())
@@ -1,3 +1,23 @@
 from django.contrib import admin
+from .models import (
+    ListenerWorker, ListenerLease, ListenerCheckpoint, RawLog, ArchivedRange,
+    PendingContribution,
+)
 
-# Register your models here.
+admin.site.register(ListenerWorker)
+admin.site.register(ListenerLease)
+admin.site.register(ListenerCheckpoint)
+admin.site.register(ArchivedRange)
+
+
+@admin.register(RawLog)
+class RawLogAdmin(admin.ModelAdmin):
+    list_display = ('address', 'block_number', 'log_index', 'tx_hash')
+    list_filter  = ('address',)
+
+
+@admin.register(PendingContribution)
+class PendingContributionAdmin(admin.ModelAdmin):
+    list_display  = ('investor', 'property', 'amount', 'currency', 'block_number')
+    list_filter   = ('property',)
+    search_fields = ('investor',)
@@ -0,0 +1,71 @@
+# homeshares_backend/blockchain/archive.py
+from django.db import transaction
+from .models import RawLog, ArchivedRange
+
+
+def _hex(value):
+    return value.hex() if isinstance(value, (bytes, bytearray)) else str(value)
+
+
+def archive_logs(address, from_block, to_block, logs, complete=True):
+    """
+    Append fetched logs and mark [from_block, to_block] as covered for address.
+
+    Pass complete=False for investor-filtered fetches: the logs are kept, but
+    the range is not claimed as fully archived.
+    """
+    address = address.lower()
+    rows = [
+        RawLog(
+            address      = address,
+            block_number = log["blockNumber"],
+            log_index    = log["logIndex"],
+            tx_hash      = _hex(log["transactionHash"]),
+            topics       = ",".join(_hex(t) for t in log["topics"]),
+            data         = _hex(log["data"]),
+        )
+        for log in logs
+    ]
+    with transaction.atomic():
+        if rows:
+            RawLog.objects.bulk_create(rows, ignore_conflicts=True, batch_size=500)
+        if complete:
+            record_range(address, from_block, to_block)
+    return len(rows)
+
+
+def record_range(address, from_block, to_block):
+    # Extend an overlapping/adjacent range instead of piling up one row per window
+    prev = (
+        ArchivedRange.objects
+        .filter(address=address, from_block__lte=from_block, to_block__gte=from_block - 1)
+        .order_by("-to_block")
+        .first()
+    )
+    if prev is None:
+        ArchivedRange.objects.create(address=address, from_block=from_block, to_block=to_block)
+    elif to_block > prev.to_block:
+        prev.to_block = to_block
+        prev.save(update_fields=["to_block"])
+
+
+def covered_ranges(address):
+    return list(
+        ArchivedRange.objects
+        .filter(address=address.lower())
+        .order_by("from_block")
+        .values_list("from_block", "to_block")
+    )
+
+
+def iter_archived(address, chunk_size=5000):
+    """Stream (block_number, tx_hash, topics, data) in chain order."""
+    rows = (
+        RawLog.objects
+        .filter(address=address.lower())
+        .order_by("block_number", "log_index")
+        .values_list("block_number", "tx_hash", "topics", "data")
+        .iterator(chunk_size=chunk_size)
+    )
+    for block_number, tx_hash, topics, data in rows:
+        yield block_number, tx_hash, topics.split(","), data
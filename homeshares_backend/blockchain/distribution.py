@@ -0,0 +1,116 @@
+# homeshares_backend/blockchain/distribution.py
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from web3 import Web3
+from properties.models import Investment
+
+RECEIPT_TIMEOUT = int(os.getenv("DISTRIBUTION_RECEIPT_TIMEOUT", "180"))  # seconds per receipt
+GAS_HEADROOM    = float(os.getenv("DISTRIBUTION_GAS_HEADROOM", "1.2"))   # × estimate_gas
+RECEIPT_WORKERS = 16
+
+
+def fee_params(w3):
+    """EIP-1559 fees when the chain reports a base fee, else a legacy gasPrice."""
+    base = w3.eth.get_block("latest").get("baseFeePerGas")
+    if base is None:
+        return {"gasPrice": w3.eth.gas_price}
+    try:
+        tip = w3.eth.max_priority_fee
+    except Exception:
+        tip = Web3.to_wei(1, "gwei")
+    # Survives the base fee doubling before inclusion
+    return {"maxPriorityFeePerGas": tip, "maxFeePerGas": 2 * base + tip}
+
+
+def distribute(w3, acct, props, abi, timeout=RECEIPT_TIMEOUT, dry_run=False, log=None):
+    """
+    Call distributeProfit() on every property's crowdfund in one pass.
+
+    Gas is estimated per call and nonces are assigned locally from the
+    pending count, so all transactions are broadcast back to back. Receipts
+    are then awaited concurrently and only confirmed properties get their
+    investments marked distributed.
+
+    Returns {property pk: {"status": ..., "tx": hash or None, "error": ...}}
+    with status one of confirmed / reverted / skipped / unsent / timeout
+    (or signed, for a dry run).
+    """
+    log = log or (lambda msg: None)
+    results = {p.pk: {"status": "skipped", "tx": None, "error": None} for p in props}
+    if not props:
+        return results
+
+    chain_id = w3.eth.chain_id
+    fees     = fee_params(w3)
+    nonce    = w3.eth.get_transaction_count(acct.address, "pending")
+
+    # 1) Estimate + sign; a property that won't estimate gets no nonce
+    signed = []
+    for prop in props:
+        cf = w3.eth.contract(address=Web3.to_checksum_address(prop.crowdfund_address), abi=abi)
+        fn = cf.functions.distributeProfit()
+        try:
+            gas = fn.estimate_gas({"from": acct.address})
+        except Exception as e:
+            results[prop.pk]["error"] = f"estimate_gas failed: {e}"
+            log(f"  ⏭️ {prop.symbol}: {results[prop.pk]['error']}")
+            continue
+        tx = fn.build_transaction({
+            "from":    acct.address,
+            "chainId": chain_id,
+            "gas":     int(gas * GAS_HEADROOM),
+            "nonce":   nonce,
+            **fees,
+        })
+        signed.append((prop, acct.sign_transaction(tx)))
+        log(f"  ✍️ {prop.symbol}: nonce {nonce}, gas {tx['gas']}")
+        nonce += 1
+
+    if dry_run:
+        for prop, _ in signed:
+            results[prop.pk]["status"] = "signed"
+        return results
+
+    # 2) Broadcast everything; after a failure later nonces would only sit in the mempool
+    sent = []
+    for i, (prop, tx) in enumerate(signed):
+        try:
+            tx_hash = w3.eth.send_raw_transaction(tx.raw_transaction)
+        except Exception as e:
+            results[prop.pk].update(status="unsent", error=f"broadcast failed: {e}")
+            log(f"  ❌ {prop.symbol}: {results[prop.pk]['error']}")
+            for later, _ in signed[i + 1:]:
+                results[later.pk].update(status="unsent", error="earlier nonce failed to broadcast")
+            break
+        results[prop.pk].update(status="timeout", tx=tx_hash.hex())
+        sent.append((prop, tx_hash))
+    log(f"  📤 Broadcast {len(sent)} transaction(s)")
+
+    # 3) Wait for all receipts at once
+    confirmed = []
+    if sent:
+        with ThreadPoolExecutor(max_workers=min(RECEIPT_WORKERS, len(sent))) as pool:
+            waits = {
+                pool.submit(w3.eth.wait_for_transaction_receipt, tx_hash, timeout): prop
+                for prop, tx_hash in sent
+            }
+            for fut in as_completed(waits):
+                prop = waits[fut]
+                try:
+                    receipt = fut.result()
+                except Exception as e:
+                    results[prop.pk]["error"] = f"no receipt: {e}"
+                    log(f"  ⌛ {prop.symbol}: {results[prop.pk]['error']}")
+                    continue
+                if receipt["status"] == 1:
+                    results[prop.pk]["status"] = "confirmed"
+                    confirmed.append(prop.pk)
+                    log(f"  ✅ {prop.symbol}: confirmed in block {receipt['blockNumber']}")
+                else:
+                    results[prop.pk].update(status="reverted", error="transaction reverted")
+                    log(f"  ❌ {prop.symbol}: reverted in block {receipt['blockNumber']}")
+
+    # 4) Only what actually landed on-chain is marked distributed
+    if confirmed:
+        Investment.objects.filter(property_id__in=confirmed, distributed=False).update(distributed=True)
+    return results
@@ -0,0 +1,74 @@
+# homeshares_backend/blockchain/events.py
+from eth_abi import decode
+from eth_utils import encode_hex, keccak, to_bytes
+
+# topic0 of the crowdfund events we ingest
+CONTRIBUTION_TOPIC       = encode_hex(keccak(text="Contribution(address,uint256)"))
+TOKEN_CONTRIBUTION_TOPIC = encode_hex(keccak(text="TokenContribution(address,address,uint256)"))
+CONTRIBUTION_TOPICS      = [CONTRIBUTION_TOPIC, TOKEN_CONTRIBUTION_TOPIC]
+
+
+def _as_bytes(value):
+    if isinstance(value, str):
+        return to_bytes(hexstr=value)
+    return bytes(value)
+
+
+def _topic_address(topic):
+    return "0x" + topic[-20:].hex()
+
+
+def decode_contribution(topics, data):
+    """
+    Decode a raw Contribution / TokenContribution log without an RPC or ABI.
+
+    Returns a dict with ``event``, ``investor`` (lowercase), ``amount`` (raw
+    integer units) and ``token`` (None for native MON), or None for other logs.
+    """
+    topics = [_as_bytes(t) for t in topics]
+    data   = _as_bytes(data)
+    if not topics:
+        return None
+    topic0 = encode_hex(topics[0])
+
+    if topic0 == CONTRIBUTION_TOPIC:
+        (amount,) = decode(["uint256"], data)
+        return {
+            "event":    "Contribution",
+            "investor": _topic_address(topics[1]),
+            "amount":   amount,
+            "token":    None,
+        }
+
+    if topic0 == TOKEN_CONTRIBUTION_TOPIC:
+        if len(topics) > 2:  # token indexed
+            token = _topic_address(topics[2])
+            (amount,) = decode(["uint256"], data)
+        else:
+            token, amount = decode(["address", "uint256"], data)
+        return {
+            "event":    "TokenContribution",
+            "investor": _topic_address(topics[1]),
+            "amount":   amount,
+            "token":    token.lower(),
+        }
+
+    return None
+
+
+def fetch_contribution_logs(w3, address, from_block, to_block, investor_chunks=None):
+    """
+    get_logs for both contribution events of one crowdfund.
+
+    With ``investor_chunks`` (lists of topic[1] values) only those investors'
+    logs are transferred, one request per chunk to respect provider limits.
+    """
+    params = {"address": address, "fromBlock": from_block, "toBlock": to_block}
+    if investor_chunks is None:
+        return w3.eth.get_logs({**params, "topics": [CONTRIBUTION_TOPICS]})
+
+    logs = []
+    for investors in investor_chunks:
+        logs.extend(w3.eth.get_logs({**params, "topics": [CONTRIBUTION_TOPICS, investors]}))
+    logs.sort(key=lambda log: (log["blockNumber"], log["logIndex"]))
+    return logs
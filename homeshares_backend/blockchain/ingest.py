@@ -0,0 +1,134 @@
+# homeshares_backend/blockchain/ingest.py
+import os
+from django.db import transaction
+from django.db.models.functions import Lower
+from properties.cache import bump_properties
+from properties.models import Investment
+from users.models import Profile
+from .models import PendingContribution
+
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "200"))  # rows per write transaction
+
+
+class InvestmentSink:
+    """
+    Collects decoded contributions from a listener and writes them in batches.
+
+    Wallet lookups and tx-hash dedup run before the transaction opens, so each
+    flush holds the write lock for a single bulk INSERT only. Contributions
+    from wallets no Profile owns yet are parked in PendingContribution.
+    """
+
+    def __init__(self, stdout=None, batch_size=INGEST_BATCH_SIZE):
+        self.stdout     = stdout
+        self.batch_size = batch_size
+        self.pending    = []
+
+    def add(self, prop, investor, amount, currency, tx_hash, block_number):
+        self.pending.append({
+            "property":     prop,
+            "investor":     investor.lower(),
+            "amount":       amount,
+            "currency":     currency,
+            "tx_hash":      tx_hash,
+            "block_number": block_number,
+        })
+        if len(self.pending) >= self.batch_size:
+            return self.flush()
+        return []
+
+    def flush(self):
+        if not self.pending:
+            return []
+        rows, self.pending = self.pending, []
+
+        # 1) Map on-chain addresses → Django users in one query
+        wallets = {r["investor"] for r in rows}
+        users = {
+            p.wallet: p.user
+            for p in (
+                Profile.objects
+                .annotate(wallet=Lower("wallet_address"))
+                .filter(wallet__in=wallets)
+                .select_related("user")
+            )
+        }
+
+        # 2) Drop tx hashes we already recorded
+        seen = set(
+            Investment.objects
+            .filter(tx_hash__in=[r["tx_hash"] for r in rows])
+            .values_list("tx_hash", flat=True)
+        )
+
+        new, pending = [], []
+        for r in rows:
+            if r["tx_hash"] in seen:
+                continue
+            seen.add(r["tx_hash"])
+            user = users.get(r["investor"])
+            if user is None:
+                self._write(f"    ⏳ Parking contribution from unregistered wallet {r['investor']}")
+                pending.append(PendingContribution(**r))
+                continue
+            new.append(Investment(
+                user         = user,
+                property     = r["property"],
+                amount       = r["amount"],
+                currency     = r["currency"],
+                tx_hash      = r["tx_hash"],
+                block_number = r["block_number"],
+            ))
+
+        # 3) One short write transaction for the whole batch
+        if new or pending:
+            with transaction.atomic():
+                Investment.objects.bulk_create(new, ignore_conflicts=True)
+                PendingContribution.objects.bulk_create(pending, ignore_conflicts=True)
+            bump_properties({inv.property.pk for inv in new})
+            for inv in new:
+                self._write(
+                    f"    ✅ Recorded {inv.amount} {inv.currency} by {inv.user.username} "
+                    f"in {inv.property.symbol} (tx {inv.tx_hash})"
+                )
+        return new
+
+    def _write(self, msg):
+        if self.stdout is not None:
+            self.stdout.write(msg)
+
+
+def attach_pending(users_by_wallet):
+    """
+    Turn parked contributions into Investments for newly linked wallets.
+
+    `users_by_wallet` maps wallet address → User. One indexed lookup on
+    PendingContribution.investor, then one insert and one delete.
+    """
+    users_by_wallet = {w.lower(): u for w, u in users_by_wallet.items() if w}
+    if not users_by_wallet:
+        return []
+    rows = list(
+        PendingContribution.objects
+        .filter(investor__in=users_by_wallet)
+        .select_related("property")
+    )
+    if not rows:
+        return []
+
+    new = [
+        Investment(
+            user         = users_by_wallet[p.investor],
+            property     = p.property,
+            amount       = p.amount,
+            currency     = p.currency,
+            tx_hash      = p.tx_hash,
+            block_number = p.block_number,
+        )
+        for p in rows
+    ]
+    with transaction.atomic():
+        Investment.objects.bulk_create(new, ignore_conflicts=True)
+        PendingContribution.objects.filter(pk__in=[p.pk for p in rows]).delete()
+    bump_properties({p.property_id for p in rows})
+    return new
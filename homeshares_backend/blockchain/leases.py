@@ -0,0 +1,182 @@
+# homeshares_backend/blockchain/leases.py
+import os
+import socket
+import threading
+from datetime import timedelta
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import ListenerCheckpoint, ListenerWorker, ListenerLease
+
+LEASE_TTL = int(os.getenv("LISTENER_LEASE_TTL", "30"))  # seconds without heartbeat before takeover
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def shard_of(prop, shards):
+    return prop.pk % shards
+
+
+def fair_share(shards, live, worker_id):
+    """Shards `worker_id` should hold when `live` (sorted ids) split `shards` between them."""
+    if worker_id not in live:
+        live = sorted([*live, worker_id])
+    base, extra = divmod(shards, len(live))
+    return base + (1 if live.index(worker_id) < extra else 0)
+
+
+class ShardLeaser:
+    """
+    Splits crowdfunds across listener processes with leases stored in the DB.
+
+    Each heartbeat renews this worker's leases, then claims expired/free shards
+    (or releases surplus ones) until it holds its fair share of the live workers.
+    Claims are conditional UPDATEs, so two workers never win the same shard.
+    `start()` renews from a background thread, so a slow polling round can't
+    outlive the lease.
+    """
+
+    def __init__(self, shards, worker_id=None, ttl=LEASE_TTL):
+        self.shards    = shards
+        self.worker_id = worker_id or default_worker_id()
+        self.ttl       = timedelta(seconds=ttl)
+        self.owned     = set()
+        self.stopped   = threading.Event()
+        self.thread    = None
+
+        ListenerLease.objects.bulk_create(
+            [ListenerLease(shard=i) for i in range(shards)],
+            ignore_conflicts=True,
+        )
+
+    def heartbeat(self):
+        now     = timezone.now()
+        expires = now + self.ttl
+
+        # 1) Announce ourselves and renew what we still own
+        ListenerWorker.objects.update_or_create(
+            worker_id=self.worker_id, defaults={"heartbeat_at": now}
+        )
+        ListenerLease.objects.filter(owner=self.worker_id).update(expires_at=expires)
+        # Built locally and swapped in at the end; the polling thread reads self.owned
+        owned = set(
+            ListenerLease.objects
+            .filter(owner=self.worker_id, shard__lt=self.shards)
+            .values_list("shard", flat=True)
+        )
+
+        # 2) Our fair share: shards // live each, one extra for the first
+        #    shards % live workers by id, so no live worker is left idle
+        live = list(
+            ListenerWorker.objects
+            .filter(heartbeat_at__gt=now - self.ttl)
+            .order_by("worker_id")
+            .values_list("worker_id", flat=True)
+        )
+        target = fair_share(self.shards, live, self.worker_id)
+
+        # 3a) Give back surplus so newcomers can pick it up
+        for shard in sorted(owned)[target:]:
+            ListenerLease.objects.filter(shard=shard, owner=self.worker_id).update(
+                owner="", expires_at=None
+            )
+            owned.discard(shard)
+
+        # 3b) Take over free or expired shards (dead workers) up to our share
+        if len(owned) < target:
+            free = (
+                ListenerLease.objects
+                .filter(shard__lt=self.shards)
+                .filter(Q(owner="") | Q(expires_at__isnull=True) | Q(expires_at__lt=now))
+                .values_list("shard", flat=True)
+            )
+            for shard in free:
+                if len(owned) >= target:
+                    break
+                claimed = (
+                    ListenerLease.objects
+                    .filter(shard=shard)
+                    .filter(Q(owner="") | Q(expires_at__isnull=True) | Q(expires_at__lt=now))
+                    .update(owner=self.worker_id, expires_at=expires)
+                )
+                if claimed:
+                    owned.add(shard)
+
+        self.owned = owned
+        return owned
+
+    def start(self, interval=None, stderr=None):
+        """Heartbeat every `interval` seconds (default: a third of the TTL) until release()."""
+        interval = interval or self.ttl.total_seconds() / 3
+
+        def run():
+            while not self.stopped.wait(interval):
+                try:
+                    self.heartbeat()
+                except Exception as e:
+                    if stderr is not None:
+                        stderr.write(f"⚠️ Lease heartbeat failed: {e}")
+            connections.close_all()
+
+        self.thread = threading.Thread(target=run, name="lease-heartbeat", daemon=True)
+        self.thread.start()
+
+    def owns(self, prop):
+        return shard_of(prop, self.shards) in self.owned
+
+    def confirmed(self):
+        """Shards whose lease is still ours in the DB right now."""
+        return set(
+            ListenerLease.objects
+            .filter(owner=self.worker_id, shard__lt=self.shards, expires_at__gt=timezone.now())
+            .values_list("shard", flat=True)
+        )
+
+    def release(self):
+        self.stopped.set()
+        if self.thread:
+            self.thread.join()
+        ListenerLease.objects.filter(owner=self.worker_id).update(owner="", expires_at=None)
+        ListenerWorker.objects.filter(worker_id=self.worker_id).delete()
+        self.owned = set()
+
+
+def save_checkpoints(checkpoints, leaser=None):
+    """
+    Record {property: (last scanned block, wallets_as_of)} for the next worker.
+
+    With a leaser, only properties in shards this worker still holds are
+    written. A checkpoint never moves backwards, so a worker that lost its
+    shard mid-round can't undo progress made by the new owner.
+    """
+    with transaction.atomic():
+        if leaser is not None:
+            held = leaser.confirmed()
+            checkpoints = {
+                p: cp for p, cp in checkpoints.items() if shard_of(p, leaser.shards) in held
+            }
+        if not checkpoints:
+            return []
+
+        existing = dict(
+            ListenerCheckpoint.objects
+            .filter(property__in=list(checkpoints))
+            .values_list("property_id", "block_number")
+        )
+        ListenerCheckpoint.objects.bulk_create(
+            [
+                ListenerCheckpoint(property=p, block_number=block, wallets_as_of=as_of)
+                for p, (block, as_of) in checkpoints.items() if p.pk not in existing
+            ],
+            ignore_conflicts=True,
+        )
+        now = timezone.now()
+        for p, (block, as_of) in checkpoints.items():
+            if p.pk in existing and block > existing[p.pk]:
+                # Conditional, in case another writer moved it on since the read
+                ListenerCheckpoint.objects.filter(property=p, block_number__lt=block).update(
+                    block_number=block, wallets_as_of=as_of, updated_at=now
+                )
+    return list(checkpoints)
@@ -0,0 +1,57 @@
+# homeshares_backend/blockchain/management/commands/distribute_profits.py
+import os
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from properties.models import Property
+from blockchain.abi import load_crowdfund_abi
+from blockchain.distribution import RECEIPT_TIMEOUT, distribute
+from blockchain.rpc import get_web3, rpc_urls
+
+
+class Command(BaseCommand):
+    help = "Call distributeProfit() on many crowdfunds at once and mark confirmed investments distributed"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--property", action="append", dest="properties", default=[],
+            help="Symbol, crowdfund address or id (repeatable; default: every property with undistributed investments)",
+        )
+        parser.add_argument("--timeout", type=int, default=RECEIPT_TIMEOUT, help="Seconds to wait for each receipt")
+        parser.add_argument("--dry-run", action="store_true", help="Estimate gas and sign, but don't broadcast")
+
+    def handle(self, *args, **options):
+        if not rpc_urls():
+            raise CommandError("MONAD_RPC_URL not set")
+        priv = os.getenv("DEPLOYER_PRIVATE_KEY")
+        if not priv:
+            raise CommandError("DEPLOYER_PRIVATE_KEY not set")
+
+        props = Property.objects.all()
+        if options["properties"]:
+            match = Q()
+            for key in options["properties"]:
+                match |= Q(symbol=key) | Q(crowdfund_address__iexact=key)
+                if key.isdigit():
+                    match |= Q(pk=int(key))
+            props = props.filter(match)
+        else:
+            props = props.filter(investment__distributed=False).distinct()
+        props = list(props.order_by("pk"))
+        if not props:
+            self.stdout.write("🔍 Nothing to distribute.")
+            return
+
+        w3   = get_web3()
+        acct = w3.eth.account.from_key(priv)
+        self.stdout.write(f"💸 Distributing {len(props)} propert{'y' if len(props) == 1 else 'ies'} from {acct.address}")
+
+        results = distribute(
+            w3, acct, props, load_crowdfund_abi(),
+            timeout=options["timeout"], dry_run=options["dry_run"], log=self.stdout.write,
+        )
+
+        counts = {}
+        for r in results.values():
+            counts[r["status"]] = counts.get(r["status"], 0) + 1
+        summary = ", ".join(f"{n} {status}" for status, n in sorted(counts.items()))
+        self.stdout.write(f"\n✅ Done: {summary}")
@@ -1,14 +1,11 @@
 import os
-import json
 import requests
-from django.core.management.base import BaseCommand
-from properties.models import Property, Investment
-from users.models import Profile
+from django.core.management.base import BaseCommand, CommandError
+from properties.models import Property
+from blockchain.ingest import InvestmentSink
+from blockchain.pipeline import Pipeline, Stage
 
 GHOST_API = "https://ghostgraph.monad.xyz/graphql"
-API_KEY   = os.getenv("GHOSTGRAPH_API_KEY")
-if not API_KEY:
-    raise RuntimeError("❌ Please set GHOSTGRAPH_API_KEY in your environment")
 
 # GraphQL query to page through events
 QUERY = """
@@ -34,66 +31,85 @@ class Command(BaseCommand):
     help = "Backfill & listen via GhostGraph indexer"
 
     def handle(self, *args, **opts):
-        for prop in Property.objects.all():
-            addr = prop.crowdfund_address
-            self.stdout.write(f"\n📦 Fetching events for {prop.symbol} @ {addr}")
+        # Checked here rather than at import so `manage.py help` works without it
+        self.api_key = os.getenv("GHOSTGRAPH_API_KEY")
+        if not self.api_key:
+            raise CommandError("Please set GHOSTGRAPH_API_KEY in your environment")
 
-            cursor = None
-            while True:
-                variables = {"contract": addr, "cursor": cursor}
-                resp = requests.post(
-                    GHOST_API,
-                    headers={"x-api-key": API_KEY},
-                    json={"query": QUERY, "variables": variables},
-                    timeout=30
-                )
-                data = resp.json()
-                events = data["data"]["events"]["nodes"]
-                page   = data["data"]["events"]["pageInfo"]
+        # Pages are fetched here (the cursor makes that sequential) while
+        # normalising and DB writes run behind bounded queues
+        self.sink = InvestmentSink(stdout=self.stdout)
+        pipeline = Pipeline(
+            Stage("decode",  self.decode),
+            Stage("persist", self.persist, flush=self.sink.flush),
+            stderr=self.stderr,
+        )
+        pipeline.start()
+        try:
+            for prop in Property.objects.all():
+                if pipeline.failed:
+                    break
+                addr = prop.crowdfund_address
+                self.stdout.write(f"\n📦 Fetching events for {prop.symbol} @ {addr}")
 
-                # Process each event node
-                for e in events:
-                    name   = e["name"]
-                    blk    = e["blockNumber"]
-                    tx     = e["transactionHash"]
-                    args   = e["args"]
+                cursor = None
+                while True:
+                    variables = {"contract": addr, "cursor": cursor}
+                    resp = requests.post(
+                        GHOST_API,
+                        headers={"x-api-key": self.api_key},
+                        json={"query": QUERY, "variables": variables},
+                        timeout=30
+                    )
+                    data = resp.json()
+                    events = data["data"]["events"]["nodes"]
+                    page   = data["data"]["events"]["pageInfo"]
 
-                    # Normalize investor & amount
-                    inv = args["investor"].lower()
-                    if name == "Contribution":
-                        amount   = float(args["amount"])  # ETH-denominated
-                        currency = "MON"
-                    else:  # TokenContribution
-                        token    = args["token"].lower()
-                        raw_amt  = int(args["amount"])
-                        # args may already include symbol/decimals, else fetch if needed
-                        decimals = int(args.get("decimals", 18))
-                        symbol   = args.get("symbol", token.upper()[:6])
-                        amount   = raw_amt / (10 ** decimals)
-                        currency = symbol
+                    if not pipeline.put((prop, events)):
+                        break  # a stage failed; close() below re-raises it
 
-                    # Map to user
-                    try:
-                        profile = Profile.objects.get(wallet_address__iexact=inv)
-                        user    = profile.user
-                    except Profile.DoesNotExist:
-                        self.stdout.write(f"  ⏭️ Unknown wallet {inv}")
-                        continue
+                    if not page["hasNextPage"]:
+                        break
+                    cursor = page["endCursor"]
+        except KeyboardInterrupt:
+            self.stdout.write("\n⏹ Interrupted, committing pages already fetched…")
+        finally:
+            try:
+                pipeline.close()
+            finally:
+                pipeline.report(self.stdout)
 
-                    # Deduplicate on tx hash
-                    if not Investment.objects.filter(tx_hash=tx).exists():
-                        Investment.objects.create(
-                            user         = user,
-                            property     = prop,
-                            amount       = amount,
-                            currency     = currency,
-                            tx_hash      = tx,
-                            block_number = blk
-                        )
-                        self.stdout.write(f"  ✅ {name}: {amount} {currency} by {user.username}")
+        self.stdout.write("\n✅ GhostGraph backfill complete!")
 
-                if not page["hasNextPage"]:
-                    break
-                cursor = page["endCursor"]
+    def decode(self, job):
+        prop, events = job
+        rows = []
+        for e in events:
+            name   = e["name"]
+            blk    = e["blockNumber"]
+            tx     = e["transactionHash"]
+            args   = e["args"]
 
-        self.stdout.write("\n✅ GhostGraph backfill complete!")
+            # Normalize investor & amount
+            inv = args["investor"].lower()
+            if name == "Contribution":
+                amount   = float(args["amount"])  # ETH-denominated
+                currency = "MON"
+            else:  # TokenContribution
+                token    = args["token"].lower()
+                raw_amt  = int(args["amount"])
+                # args may already include symbol/decimals, else fetch if needed
+                decimals = int(args.get("decimals", 18))
+                symbol   = args.get("symbol", token.upper()[:6])
+                amount   = raw_amt / (10 ** decimals)
+                currency = symbol
+
+            rows.append((inv, amount, currency, tx, blk))
+        return prop, rows
+
+    def persist(self, job):
+        prop, rows = job
+        for row in rows:
+            self.sink.add(prop, *row)
+        # Commit each page in one short transaction
+        self.sink.flush()
@@ -1,164 +1,191 @@
 # homeshare-backend/blockchain/management/commands/listen_contributions.py
 import os
-import json
 from web3 import Web3
 from requests.exceptions import HTTPError, ReadTimeout
 from django.core.management.base import BaseCommand
 from properties.models import Property, Investment
-from users.models import Profile
+from blockchain.archive import archive_logs
+from blockchain.events import CONTRIBUTION_TOPICS, decode_contribution
+from blockchain.ingest import InvestmentSink
+from blockchain.pipeline import (
+    PIPELINE_DECODE_WORKERS, PIPELINE_FETCH_WORKERS, PIPELINE_QUEUE_SIZE, Pipeline, Stage,
+)
+from blockchain.rpc import get_web3, rpc_urls
+
+ERC20_META_ABI = [
+    {"inputs":[],"name":"symbol","outputs":[{"type":"string"}],"type":"function"},
+    {"inputs":[],"name":"decimals","outputs":[{"type":"uint8"}],"type":"function"},
+]
 
 class Command(BaseCommand):
-    help = "Listen for Contribution events on Monad Testnet and record investments"
+    help = (
+        "Listen for Contribution events on Monad Testnet and record investments. "
+        "Fetched logs are archived; use `reindex` to rebuild without the RPC."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fetch-workers", type=int, default=PIPELINE_FETCH_WORKERS,
+            help="Block windows fetched from the RPC concurrently",
+        )
+        parser.add_argument(
+            "--decode-workers", type=int, default=PIPELINE_DECODE_WORKERS,
+            help="Threads decoding logs ahead of the DB writer",
+        )
+        parser.add_argument(
+            "--queue-size", type=int, default=PIPELINE_QUEUE_SIZE,
+            help="Windows buffered between stages before upstream stages wait",
+        )
 
     def handle(self, *args, **options):
         # 1. Load env
-        rpc_url = os.getenv("MONAD_RPC_URL")
-        if not rpc_url:
+        urls = rpc_urls()
+        if not urls:
             self.stderr.write("❌ MONAD_RPC_URL not set")
             return
-        rpc_url = rpc_url.rstrip("/")
+        rpc_url = ", ".join(urls)
 
         batch_size = int(os.getenv("BATCH_SIZE", "500000"))  # e.g. 500k blocks per batch
-        reset       = os.getenv("RESET_FROM_BLOCK") == "1"
+        reset      = os.getenv("RESET_FROM_BLOCK") == "1"
 
-        # 2. Connect to Monad
-        w3 = Web3(Web3.HTTPProvider(rpc_url, request_kwargs={"timeout": 60}))
-        if not w3.is_connected():
+        # 2. Connect to Monad (fails over across MONAD_RPC_URLS)
+        self.w3 = get_web3(timeout=60, urls=urls)
+        if not self.w3.is_connected():
             self.stderr.write(f"❌ Could not connect to {rpc_url}")
             return
-        latest_block = w3.eth.block_number
+        latest_block = self.w3.eth.block_number
         self.stdout.write(f"🔗 Connected to {rpc_url} — latest block is {latest_block}")
 
-        # 3. Load ABI
-        project_root = os.path.abspath(
-            os.path.join(os.path.dirname(__file__), "..", "..", "..")
+        # 3. ERC20 metadata is fetched once per token
+        self.token_meta = {}
+        self.sink       = InvestmentSink(stdout=self.stdout)
+
+        # 4. fetch → decode → persist, connected by bounded queues; the single
+        #    writer commits windows in scan order so a restart resumes cleanly
+        size = options["queue_size"]
+        pipeline = Pipeline(
+            Stage("fetch",   self.fetch,   workers=options["fetch_workers"],  queue_size=size),
+            Stage("decode",  self.decode,  workers=options["decode_workers"], queue_size=size),
+            Stage("persist", self.persist, ordered=True, queue_size=size, flush=self.sink.flush),
+            stderr=self.stderr,
         )
-        abi_path = os.path.join(project_root, "blockchain", "abi", "PropertyCrowdfund.json")
-        with open(abi_path) as f:
-            artifact = json.load(f)
-        if isinstance(artifact, dict) and "abi" in artifact:
-            abi = artifact["abi"]
-        elif isinstance(artifact, list):
-            abi = artifact
-        else:
-            self.stderr.write("❌ Invalid ABI format")
-            return
 
-        # 4. Precompute topics
-        native_topic = w3.keccak(text="Contribution(address,uint256)").hex()
-        token_topic  = w3.keccak(text="TokenContribution(address,address,uint256)").hex()
-
-        # 5. Process each property
-        for prop in Property.objects.all():
-            self.stdout.write(f"\n📦 Processing {prop.symbol} @ {prop.crowdfund_address}")
-            contract = w3.eth.contract(address=prop.crowdfund_address, abi=abi)
-
-            # 5a. Determine start block
-            if reset:
-                start_block = 0
-            else:
-                last_inv = (
-                    Investment.objects
-                    .filter(property=prop)
-                    .order_by("-block_number")
-                    .first()
-                )
-                start_block = last_inv.block_number + 1 if last_inv else 0
-
-            if start_block > latest_block:
-                self.stdout.write("🔍 No new blocks to scan.")
-                continue
-
-            # 5b. Batch-scan from start_block → latest_block
-            start = start_block
-            while start <= latest_block:
-                end = min(start + batch_size - 1, latest_block)
-                self.stdout.write(f"⏱ Scanning blocks {start} → {end}")
-
-                # Two-pass: native vs token contributions
-                for topic, handler_name in (
-                    (native_topic, "Contribution"),
-                    (token_topic,  "TokenContribution"),
-                ):
-                    filter_params = {
-                        "address":   prop.crowdfund_address,
-                        "fromBlock": start,
-                        "toBlock":   end,
-                        "topics":    [native_topic],   # or [token_topic] in the second pass
-                    }
-                    raw_logs = w3.eth.get_logs(filter_params)
-                    try:
-                        raw_logs = w3.eth.get_logs(filter_params)
-                        self.stdout.write(f"  📝 {len(raw_logs)} logs for topic {handler_name}")
-                    except (HTTPError, ReadTimeout) as e:
-                        self.stderr.write(f"  ⚠️ RPC timeout on {start}–{end}: {e}")
-                        # reduce batch or skip
-                        if batch_size > 1:
-                            batch_size = max(1, batch_size // 2)
-                            self.stdout.write(f"    ↘ New batch_size: {batch_size}")
-                        else:
-                            self.stderr.write(f"    ↘ Skipping block {start}")
-                            start += 1
-                        continue
-                    except Exception as e:
-                        self.stderr.write(f"  ❌ Error fetching logs: {e}")
-                        continue
-
-                    # Process each raw log
-                    for raw in raw_logs:
-                        try:
-                            ev = getattr(contract.events, handler_name)().processLog(raw)
-                        except Exception as e:
-                            self.stderr.write(f"    ❌ Failed to decode {handler_name}: {e}")
-                            continue
-
-                        # Extract common fields
-                        investor     = ev["args"]["investor"].lower()
-                        tx_hash      = raw["transactionHash"].hex()
-                        block_number = raw["blockNumber"]
-
-                        # Determine amount & currency
-                        if handler_name == "Contribution":
-                            amount   = w3.from_wei(ev["args"]["amount"], "ether")
-                            currency = "MON"
-                        else:
-                            token_addr = ev["args"]["token"]
-                            raw_amt    = ev["args"]["amount"]
-                            # fetch ERC20 symbol/decimals on-the-fly
-                            erc20 = w3.eth.contract(
-                                address=token_addr,
-                                abi=[
-                                    {"inputs":[],"name":"symbol","outputs":[{"type":"string"}],"type":"function"},
-                                    {"inputs":[],"name":"decimals","outputs":[{"type":"uint8"}],"type":"function"},
-                                ]
-                            )
-                            symbol   = erc20.functions.symbol().call()
-                            decimals = erc20.functions.decimals().call()
-                            amount   = raw_amt / (10 ** decimals)
-                            currency = symbol
-
-                        # Map to Django user
-                        try:
-                            profile = Profile.objects.get(wallet_address__iexact=investor)
-                            user    = profile.user
-                        except Profile.DoesNotExist:
-                            self.stdout.write(f"    ⏭️ Skipping unknown wallet {investor}")
-                            continue
-
-                        # Save unique investment
-                        if not Investment.objects.filter(tx_hash=tx_hash).exists():
-                            Investment.objects.create(
-                                user         = user,
-                                property     = prop,
-                                amount       = amount,
-                                currency     = currency,
-                                tx_hash      = tx_hash,
-                                block_number = block_number
-                            )
-                            self.stdout.write(
-                                f"    ✅ Recorded {amount} {currency} by {user.username} (tx {tx_hash})"
-                            )
-
-                start = end + 1
+        # 5. Queue every property's windows; put() blocks while the writer catches up
+        #    and refuses more once a stage has failed
+        pipeline.start()
+        try:
+            for prop in Property.objects.all():
+                if pipeline.failed:
+                    break
+                self.stdout.write(f"\n📦 Processing {prop.symbol} @ {prop.crowdfund_address}")
+
+                # 5a. Determine start block
+                if reset:
+                    start_block = 0
+                else:
+                    last_inv = (
+                        Investment.objects
+                        .filter(property=prop)
+                        .order_by("-block_number")
+                        .first()
+                    )
+                    start_block = last_inv.block_number + 1 if last_inv else 0
+
+                if start_block > latest_block:
+                    self.stdout.write("🔍 No new blocks to scan.")
+                    continue
+
+                # 5b. Batch-scan from start_block → latest_block
+                start = start_block
+                while start <= latest_block:
+                    end = min(start + batch_size - 1, latest_block)
+                    if not pipeline.put((prop, start, end)):
+                        break
+                    start = end + 1
+        except KeyboardInterrupt:
+            self.stdout.write("\n⏹ Interrupted, committing windows already fetched…")
+        finally:
+            # Re-raises a stage failure; nothing after the failed window was committed
+            try:
+                pipeline.close()
+            finally:
+                pipeline.report(self.stdout)
 
         self.stdout.write("\n✅ listen_contributions run complete.")
+
+    def fetch(self, job):
+        prop, start, end = job
+        return {"prop": prop, "windows": self.fetch_window(prop, start, end)}
+
+    def fetch_window(self, prop, start, end):
+        # One pass for both native and token contributions (topic0 OR-filter)
+        self.stdout.write(f"⏱ Scanning {prop.symbol} blocks {start} → {end}")
+        filter_params = {
+            "address":   prop.crowdfund_address,
+            "fromBlock": start,
+            "toBlock":   end,
+            "topics":    [CONTRIBUTION_TOPICS],
+        }
+        try:
+            raw_logs = self.w3.eth.get_logs(filter_params)
+            self.stdout.write(f"  📝 {len(raw_logs)} contribution logs in {start}–{end}")
+            return [(start, end, raw_logs)]
+        except (HTTPError, ReadTimeout) as e:
+            self.stderr.write(f"  ⚠️ RPC timeout on {start}–{end}: {e}")
+            # Split this window (other windows keep BATCH_SIZE). A single block that
+            # still fails stops the pipeline, so nothing after it is committed and the
+            # next run retries from here instead of leaving a silent gap.
+            if start == end:
+                self.stderr.write(f"    ↘ Block {start} keeps failing, stopping")
+                raise
+            half = (end - start + 1) // 2
+            self.stdout.write(f"    ↘ Retrying as two windows of ~{half} blocks")
+            mid = start + half - 1
+            return self.fetch_window(prop, start, mid) + self.fetch_window(prop, mid + 1, end)
+
+    def decode(self, job):
+        rows = []
+        for _, _, raw_logs in job["windows"]:
+            for raw in raw_logs:
+                try:
+                    ev = decode_contribution(raw["topics"], raw["data"])
+                except Exception as e:
+                    self.stderr.write(f"    ❌ Failed to decode log: {e}")
+                    continue
+                if ev is None:
+                    continue
+
+                # Determine amount & currency
+                if ev["token"] is None:
+                    amount   = self.w3.from_wei(ev["amount"], "ether")
+                    currency = "MON"
+                else:
+                    symbol, decimals = self.token_info(ev["token"])
+                    amount   = ev["amount"] / (10 ** decimals)
+                    currency = symbol
+
+                rows.append((
+                    ev["investor"], amount, currency,
+                    raw["transactionHash"].hex(), raw["blockNumber"],
+                ))
+        return {**job, "rows": rows}
+
+    def token_info(self, token):
+        if token not in self.token_meta:
+            # fetch ERC20 symbol/decimals on-the-fly
+            erc20 = self.w3.eth.contract(address=Web3.to_checksum_address(token), abi=ERC20_META_ABI)
+            self.token_meta[token] = (
+                erc20.functions.symbol().call(),
+                erc20.functions.decimals().call(),
+            )
+        return self.token_meta[token]
+
+    def persist(self, job):
+        prop = job["prop"]
+        # Keep the raw logs so `reindex` can rebuild without the RPC
+        for start, end, raw_logs in job["windows"]:
+            archive_logs(prop.crowdfund_address, start, end, raw_logs)
+        for row in job["rows"]:
+            self.sink.add(prop, *row)
+        # Commit this window before moving on
+        self.sink.flush()
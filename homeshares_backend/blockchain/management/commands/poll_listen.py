@@ -2,110 +2,236 @@
 
 import os
 import time
-import json
-from web3 import Web3
 from requests.exceptions import HTTPError
 from django.core.management.base import BaseCommand
-from properties.models import Property, Investment
-from users.models import Profile
-
-POLL_INTERVAL = int(os.getenv("POLL_INTERVAL", "5"))  # seconds between polls
+from properties.models import Property
+from blockchain.archive import archive_logs
+from blockchain.events import decode_contribution, fetch_contribution_logs
+from blockchain.ingest import InvestmentSink
+from blockchain.leases import ShardLeaser, save_checkpoints
+from blockchain.models import ListenerCheckpoint
+from blockchain.rpc import get_web3, rpc_urls
+from blockchain.wallets import WalletFilter, topic_chunks, wallets_changed_since
+
+POLL_INTERVAL   = int(os.getenv("POLL_INTERVAL", "5"))    # seconds between polls
+BACKFILL_WINDOW = int(os.getenv("BATCH_SIZE", "500000"))  # blocks per backfill get_logs
+BACKFILL_WINDOWS_PER_ROUND = int(os.getenv("BACKFILL_WINDOWS_PER_ROUND", "2"))  # keeps live polling going
 
 class Command(BaseCommand):
     help = "Poll for new Contribution events (future-only) over HTTP"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--shards", type=int, default=int(os.getenv("LISTENER_SHARDS", "0")),
+            help="Split crowdfunds into N leased shards shared by all running workers (0 = watch all)",
+        )
+        parser.add_argument(
+            "--worker-id", default=os.getenv("LISTENER_WORKER_ID"),
+            help="Stable name for this worker (defaults to host:pid)",
+        )
+        parser.add_argument(
+            "--wallet-filter", action="store_true", default=os.getenv("WALLET_FILTER") == "1",
+            help="Only fetch logs whose investor is a registered Profile wallet",
+        )
+
     def handle(self, *args, **options):
         # 1) Connect to your chosen RPC
-        rpc = os.getenv("MONAD_RPC_URL", "https://testnet-rpc.monad.xyz")
-        w3  = Web3(Web3.HTTPProvider(rpc, request_kwargs={"timeout": 10}))
-        if not w3.is_connected():
+        urls = rpc_urls(default="https://testnet-rpc.monad.xyz")
+        rpc  = ", ".join(urls)
+        self.w3 = get_web3(timeout=10, urls=urls)
+        if not self.w3.is_connected():
             return self.stderr.write(f"❌ Cannot connect to {rpc}")
-        self.stdout.write(f"🔗 Connected to {rpc} — chain tip is {w3.eth.block_number}")
-
-        # 2) Load the Crowdfund ABI once
-        project_root = os.path.abspath(os.path.join(__file__, "..", "..", "..", ".."))
-        abi_path     = os.path.join(project_root, "blockchain", "abi", "PropertyCrowdfund.json")
-        with open(abi_path) as f:
-            artifact = json.load(f)
-        abi = artifact.get("abi", artifact) if isinstance(artifact, dict) else artifact
-
-        # 3) Precompute the native Contribution topic hash
-        native_topic = w3.keccak(text="Contribution(address,uint256)").hex()
-
-        # 4) Initialize “last seen” at the current tip for each property
-        last_seen = {}
-        chain_tip = w3.eth.block_number
-        for prop in Property.objects.all():
-            last_seen[prop.pk] = chain_tip
-            self.stdout.write(f"▶️ Watching {prop.symbol} from block {chain_tip + 1}")
-
-        # 5) Enter the polling loop
-        while True:
+        self.stdout.write(f"🔗 Connected to {rpc} — chain tip is {self.w3.eth.block_number}")
+
+        # 2) Optional worker mode: only watch the shards this process leases
+        shards = options["shards"]
+        self.leaser = ShardLeaser(shards, worker_id=options["worker_id"]) if shards else None
+        if self.leaser:
+            self.stdout.write(f"🧩 Worker {self.leaser.worker_id} sharing {shards} shards")
+            # Renew from a thread: one slow round (RPC timeouts, a long backfill)
+            # must not let the lease expire while we're still scanning
+            self.leaser.heartbeat()
+            self.leaser.start(stderr=self.stderr)
+            self.shards_seen = set(self.leaser.owned)
+
+        # 3) Optional investor filter: transfer only registered wallets' logs
+        self.wallets = WalletFilter() if options["wallet_filter"] else None
+        if self.wallets:
+            self.wallets.refresh()
+            self.stdout.write(f"👛 Filtering on {len(self.wallets.wallets)} registered wallets")
+
+        # 4) Enter the polling loop
+        self.last_seen = {}
+        self.backfills = []
+        self.sink      = InvestmentSink(stdout=self.stdout)
+        try:
+            while True:
+                self.poll_once()
+                time.sleep(POLL_INTERVAL)
+        except KeyboardInterrupt:
+            self.sink.flush()
+            if self.leaser:
+                self.leaser.release()
+            self.stdout.write("👋 Stopped, leases released")
+
+    def poll_once(self):
+        w3 = self.w3
+        try:
+            chain_tip = w3.eth.block_number
+        except Exception as e:
+            self.stderr.write(f"⚠️ Error fetching chain tip: {e}")
+            return
+
+        # Re-read properties every round so new crowdfunds are picked up live
+        props = list(Property.objects.all())
+        if self.leaser:
+            owned = self.leaser.owned
+            if owned != self.shards_seen:
+                self.stdout.write(f"🧩 Now leasing shards {sorted(owned)}")
+                self.shards_seen = owned
+            props = [p for p in props if self.leaser.owns(p)]
+
+        # Wallets registered while we were running need their history fetched
+        if self.wallets:
+            as_of = self.wallets.as_of
+            added = self.wallets.refresh()
+            if added:
+                self.stdout.write(f"👛 {len(added)} new wallet(s) registered, queueing backfill")
+                for prop in props:
+                    if prop.pk in self.last_seen:
+                        self.queue_backfill(prop, added, self.last_seen[prop.pk], as_of)
+
+        # Resume newly owned properties from their checkpoint, else from the tip
+        for pk in set(self.last_seen) - {p.pk for p in props}:
+            del self.last_seen[pk]
+        fresh = [p for p in props if p.pk not in self.last_seen]
+        if fresh:
+            saved = {
+                cp.property_id: cp
+                for cp in ListenerCheckpoint.objects.filter(property__in=fresh)
+            }
+            for prop in fresh:
+                cp = saved.get(prop.pk)
+                self.last_seen[prop.pk] = cp.block_number if cp else chain_tip
+                self.stdout.write(f"▶️ Watching {prop.symbol} from block {self.last_seen[prop.pk] + 1}")
+                # Checkpoint came from a filtered scan: catch up wallets registered since
+                if cp and cp.wallets_as_of:
+                    added = wallets_changed_since(cp.wallets_as_of)
+                    if added:
+                        self.queue_backfill(prop, added, cp.block_number, cp.wallets_as_of)
+
+        self.run_backfills()
+
+        investor_chunks = self.wallets.topic_chunks() if self.wallets else None
+        progressed = []
+        for prop in props:
+            if self.leaser and not self.leaser.owns(prop):
+                continue  # shard moved to another worker mid-round
+            watch_block = self.last_seen[prop.pk] + 1
+            if watch_block > chain_tip:
+                continue  # nothing new yet
+
+            to_block = min(watch_block + 20, chain_tip)  # poll up to 20 blocks at a time
             try:
-                chain_tip = w3.eth.block_number
+                logs = fetch_contribution_logs(
+                    w3, prop.crowdfund_address, watch_block, to_block, investor_chunks
+                )
+            except HTTPError as e:
+                self.stderr.write(f"⚠️ RPC error on block {watch_block}: {e}")
+                # do not advance last_seen here, retry next loop
+                continue
             except Exception as e:
-                self.stderr.write(f"⚠️ Error fetching chain tip: {e}")
-                time.sleep(POLL_INTERVAL)
+                self.stderr.write(f"❌ Unexpected error on block {watch_block}: {e}")
+                self.last_seen[prop.pk] = watch_block
                 continue
 
-            for prop in Property.objects.all():
-                watch_block = last_seen[prop.pk] + 1
-                if watch_block > chain_tip:
-                    continue  # nothing new yet
+            self.ingest(prop, watch_block, to_block, logs)
+
+            # Mark block as seen (whether logs or not)
+            self.last_seen[prop.pk] = to_block
+            progressed.append(prop)
+
+        # Commit everything seen this round, then checkpoint shards we still hold
+        self.sink.flush()
+        if progressed:
+            save_checkpoints(
+                {p: (self.last_seen[p.pk], self.wallets_as_of(p)) for p in progressed},
+                leaser=self.leaser,
+            )
 
-                to_block = min(watch_block + 20, chain_tip)  # poll up to 20 blocks at a time
+    def ingest(self, prop, from_block, to_block, logs):
+        # Filtered fetches are archived too, but don't count as complete coverage
+        archive_logs(prop.crowdfund_address, from_block, to_block, logs, complete=not self.wallets)
+        self.ingest_logs(prop, logs)
+
+    def ingest_logs(self, prop, logs):
+        # Process any native Contribution events
+        for log in logs:
+            try:
+                ev = decode_contribution(log["topics"], log["data"])
+            except Exception as e:
+                self.stderr.write(f"❌ Failed to decode log on block {log['blockNumber']}: {e}")
+                continue
+            if ev is None or ev["token"] is not None:
+                continue
+
+            inv_addr = ev["investor"]
+            amount   = self.w3.from_wei(ev["amount"], "ether")
+            tx_hash  = log["transactionHash"].hex()
+            blk       = log["blockNumber"]
+
+            self.sink.add(prop, inv_addr, amount, "MON", tx_hash, blk)
+
+    def queue_backfill(self, prop, wallets, to_block, as_of):
+        self.backfills.append({
+            "prop":   prop,
+            "chunks": topic_chunks(wallets),
+            "start":  0,
+            "to":     to_block,
+            "as_of":  as_of,  # wallets covered before this backfill
+        })
+
+    def wallets_as_of(self, prop):
+        # Until its backfill finishes, a property's checkpoint mustn't claim the
+        # new wallets, so whoever resumes it (maybe another worker) redoes them
+        if not self.wallets:
+            return None
+        held = [job["as_of"] for job in self.backfills if job["prop"].pk == prop.pk]
+        if not held:
+            return self.wallets.as_of
+        return None if None in held else min(held)
+
+    def run_backfills(self, budget=BACKFILL_WINDOWS_PER_ROUND):
+        # Scan [0, checkpoint] for just the new wallets, a few windows per round so
+        # live polling isn't held up; resume from `start` next round or after RPC errors
+        while self.backfills:
+            job  = self.backfills[0]
+            prop = job["prop"]
+            if self.leaser and not self.leaser.owns(prop):
+                # Its checkpoint still predates these wallets; the new owner redoes them
+                self.backfills.pop(0)
+                continue
+            while job["start"] <= job["to"]:
+                if self.leaser and not self.leaser.owns(prop):
+                    self.stdout.write(f"🧩 {prop.symbol} moved to another worker, dropping its backfill")
+                    break
+                if budget <= 0:
+                    self.sink.flush()
+                    return
+                budget -= 1
+                end = min(job["start"] + BACKFILL_WINDOW - 1, job["to"])
                 try:
-                    logs = w3.eth.get_logs({
-                        "address":   prop.crowdfund_address,
-                        "fromBlock": watch_block,
-                        "toBlock":   to_block,
-                        "topics":    [native_topic],
-                    })
-                except HTTPError as e:
-                    self.stderr.write(f"⚠️ RPC error on block {watch_block}: {e}")
-                    # do not advance last_seen here, retry next loop
-                    continue
+                    logs = fetch_contribution_logs(
+                        self.w3, prop.crowdfund_address, job["start"], end, job["chunks"]
+                    )
                 except Exception as e:
-                    self.stderr.write(f"❌ Unexpected error on block {watch_block}: {e}")
-                    last_seen[prop.pk] = watch_block
-                    continue
-
-                # Process any Contribution events
-                cf = w3.eth.contract(address=prop.crowdfund_address, abi=abi)
-                for log in logs:
-                    try:
-                        ev = cf.events.Contribution().process_log(log)
-                    except Exception as e:
-                        self.stderr.write(f"❌ Failed to decode log on block {watch_block}: {e}")
-                        continue
-
-                    inv_addr = ev["args"]["investor"].lower()
-                    amount   = w3.from_wei(ev["args"]["amount"], "ether")
-                    tx_hash  = log["transactionHash"].hex()
-                    blk       = log["blockNumber"]
-
-                    # Map on-chain address → Django user
-                    try:
-                        profile = Profile.objects.get(wallet_address__iexact=inv_addr)
-                        user    = profile.user
-                    except Profile.DoesNotExist:
-                        self.stdout.write(f"⏭️ Skipping unknown wallet {inv_addr}")
-                        continue
-
-                    # Deduplicate and record
-                    if not Investment.objects.filter(tx_hash=tx_hash).exists():
-                        Investment.objects.create(
-                            user         = user,
-                            property     = prop,
-                            amount       = amount,
-                            currency     = "MON",
-                            tx_hash      = tx_hash,
-                            block_number = blk
-                        )
-                        self.stdout.write(f"✅ {prop.symbol}: {amount} MON by {user.username} (block {blk})")
-
-                # Mark block as seen (whether logs or not)
-                last_seen[prop.pk] = to_block
-
-            # Wait before polling again
-            time.sleep(POLL_INTERVAL)
+                    self.stderr.write(f"⚠️ Backfill of {prop.symbol} paused at block {job['start']}: {e}")
+                    return
+                # Backfills are always investor-filtered, never complete coverage
+                archive_logs(prop.crowdfund_address, job["start"], end, logs, complete=False)
+                self.ingest_logs(prop, logs)
+                job["start"] = end + 1
+            else:
+                self.sink.flush()
+                self.stdout.write(f"👛 Backfilled new wallets on {prop.symbol} up to block {job['to']}")
+            self.backfills.pop(0)
@@ -5,8 +5,8 @@ import json
 import asyncio
 from web3 import Web3, LegacyWebSocketProvider
 from django.core.management.base import BaseCommand
-from properties.models import Property, Investment
-from users.models import Profile
+from properties.models import Property
+from blockchain.ingest import InvestmentSink
 
 class Command(BaseCommand):
     help = "Subscribe to Contribution events over WebSocket and record in real-time"
@@ -40,6 +40,8 @@ class Command(BaseCommand):
             self.stdout.write(f"📦 Subscribed to {prop.symbol} @ {prop.crowdfund_address}")
 
         # 5) Poll for new entries
+        sink = InvestmentSink(stdout=self.stdout)
+
         async def watch():
             while True:
                 for prop, filt in subscriptions:
@@ -49,24 +51,8 @@ class Command(BaseCommand):
                         tx  = ev["transactionHash"].hex()
                         blk = ev["blockNumber"]
 
-                        # Map to user
-                        try:
-                            profile = Profile.objects.get(wallet_address__iexact=inv)
-                            user = profile.user
-                        except Profile.DoesNotExist:
-                            continue
-
-                        # Deduplicate & save
-                        if not Investment.objects.filter(tx_hash=tx).exists():
-                            Investment.objects.create(
-                                user         = user,
-                                property     = prop,
-                                amount       = amt,
-                                currency     = "MON",
-                                tx_hash      = tx,
-                                block_number = blk
-                            )
-                            self.stdout.write(f"✅ Real-time: {amt} MON by {user.username}")
+                        sink.add(prop, inv, amt, "MON", tx, blk)
+                sink.flush()
                 await asyncio.sleep(5)
 
         asyncio.run(watch())
@@ -0,0 +1,111 @@
+# homeshares_backend/blockchain/management/commands/reindex.py
+from eth_utils import from_wei
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from properties.cache import bump_properties
+from properties.models import Property, Investment
+from blockchain.archive import covered_ranges, iter_archived
+from blockchain.events import decode_contribution
+from blockchain.ingest import InvestmentSink
+
+
+class Command(BaseCommand):
+    help = "Rebuild native MON investments in the archived block ranges from the local raw-log archive (no RPC)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--property", action="append", dest="properties", default=[],
+            help="Symbol or crowdfund address to reindex (repeatable, default: all)",
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=5000,
+            help="Archived rows read and investments written per round-trip",
+        )
+
+    def handle(self, *args, **options):
+        props = Property.objects.all()
+        if options["properties"]:
+            match = Q()
+            for key in options["properties"]:
+                match |= Q(symbol=key) | Q(crowdfund_address__iexact=key)
+            props = props.filter(match)
+
+        chunk_size = options["chunk_size"]
+        verbose    = options["verbosity"] > 1
+
+        for prop in props:
+            addr   = prop.crowdfund_address
+            ranges = covered_ranges(addr)
+            if not ranges:
+                self.stdout.write(f"\n⚠️ {prop.symbol}: nothing archived yet, run listen_contributions first")
+                continue
+
+            self.stdout.write(f"\n📦 Reindexing {prop.symbol} @ {addr}")
+            self.stdout.write(f"  🗄 Archive covers {self.describe(ranges)}")
+
+            # Only blocks the archive fully covers can be rebuilt from it; rows
+            # outside (pre-archive history, other listeners, gaps) are kept
+            covered = Q()
+            for lo, hi in ranges:
+                covered |= Q(block_number__gte=lo, block_number__lte=hi)
+            kept = (
+                Investment.objects
+                .filter(property=prop, currency="MON")
+                .exclude(covered)
+                .count()
+            )
+
+            native = tokens = 0
+            with transaction.atomic():
+                # Distribution status is off-chain state; carry it over
+                distributed = set(
+                    Investment.objects
+                    .filter(property=prop, distributed=True)
+                    .values_list("tx_hash", flat=True)
+                )
+                # Token contributions need on-chain ERC20 metadata, so leave them as-is
+                Investment.objects.filter(covered, property=prop, currency="MON").delete()
+                bump_properties([prop.pk])  # applied when this transaction commits
+
+                sink = InvestmentSink(stdout=self.stdout if verbose else None, batch_size=chunk_size)
+                for block_number, tx_hash, topics, data in iter_archived(addr, chunk_size):
+                    ev = decode_contribution(topics, data)
+                    if ev is None:
+                        continue
+                    if ev["token"] is not None:
+                        tokens += 1
+                        continue
+                    sink.add(
+                        prop, ev["investor"], from_wei(ev["amount"], "ether"),
+                        "MON", tx_hash, block_number,
+                    )
+                    native += 1
+                sink.flush()
+
+                distributed = list(distributed)
+                for i in range(0, len(distributed), chunk_size):
+                    Investment.objects.filter(
+                        property=prop, tx_hash__in=distributed[i:i + chunk_size]
+                    ).update(distributed=True)
+
+            recorded = Investment.objects.filter(property=prop, currency="MON").count()
+            self.stdout.write(f"  ✅ {native} contributions replayed, {recorded} investments recorded")
+            if kept:
+                self.stdout.write(f"  📌 {kept} investments outside the archived ranges kept as-is")
+            if tokens:
+                self.stdout.write(f"  🪙 {tokens} token contributions skipped (kept existing rows)")
+
+        self.stdout.write("\n✅ reindex complete.")
+
+    def describe(self, ranges):
+        parts = [f"{lo}→{hi}" for lo, hi in ranges]
+        gaps  = [
+            f"{prev_hi + 1}→{lo - 1}"
+            for (_, prev_hi), (lo, _) in zip(ranges, ranges[1:])
+            if lo > prev_hi + 1
+        ]
+        text = ", ".join(parts)
+        if gaps:
+            text += f" (gaps: {', '.join(gaps)})"
+        return text
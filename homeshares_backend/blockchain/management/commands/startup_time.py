@@ -0,0 +1,47 @@
+# homeshares_backend/blockchain/management/commands/startup_time.py
+import statistics
+import subprocess
+import sys
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# What a web worker does before its first request: settings, apps, URLconf
+BOOT = """
+import os, sys, time
+started = time.perf_counter()
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "homeshares_backend.settings")
+import django
+django.setup()
+from django.urls import get_resolver
+get_resolver().url_patterns
+{extra}
+print(time.perf_counter() - started, "web3" in sys.modules)
+"""
+
+SCENARIOS = {
+    "web":           "",
+    "web + preload": "from blockchain.preload import warm; warm()",
+    "web + web3":    "import web3",
+}
+
+
+class Command(BaseCommand):
+    help = "Time a cold web-worker boot (fresh interpreters) with and without the chain preload"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per scenario")
+
+    def handle(self, *args, **options):
+        for name, extra in SCENARIOS.items():
+            times, loaded = [], False
+            for _ in range(options["runs"]):
+                out = subprocess.run(
+                    [sys.executable, "-c", BOOT.format(extra=extra)],
+                    cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+                ).stdout.split()
+                times.append(float(out[0]))
+                loaded = out[1] == "True"
+            self.stdout.write(
+                f"⏱ {name:<14} median {statistics.median(times) * 1000:6.0f}ms  "
+                f"min {min(times) * 1000:6.0f}ms  web3 loaded: {'yes' if loaded else 'no'}"
+            )
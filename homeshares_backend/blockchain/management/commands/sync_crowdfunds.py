@@ -0,0 +1,48 @@
+# homeshares_backend/blockchain/management/commands/sync_crowdfunds.py
+import os
+import time
+from django.core.management.base import BaseCommand
+from blockchain.rpc import get_web3, rpc_urls
+from blockchain.state import sync_states
+
+SYNC_INTERVAL = int(os.getenv("SYNC_INTERVAL", "30"))  # seconds between syncs with --loop
+
+
+class Command(BaseCommand):
+    help = "Copy closed / returnsPool / returnsPerToken from every crowdfund into Property"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop", action="store_true",
+            help=f"Keep syncing every --interval seconds (default {SYNC_INTERVAL})",
+        )
+        parser.add_argument("--interval", type=int, default=SYNC_INTERVAL)
+
+    def handle(self, *args, **options):
+        urls = rpc_urls()
+        if not urls:
+            self.stderr.write("❌ MONAD_RPC_URL not set")
+            return
+        w3 = get_web3(timeout=30, urls=urls)
+
+        try:
+            while True:
+                self.sync_once(w3)
+                if not options["loop"]:
+                    break
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            self.stdout.write("👋 Stopped")
+
+    def sync_once(self, w3):
+        try:
+            block, changed = sync_states(w3)
+        except Exception as e:
+            self.stderr.write(f"⚠️ Sync failed: {e}")
+            return
+        for prop in changed:
+            self.stdout.write(
+                f"  🔄 {prop.symbol}: closed={prop.closed} "
+                f"pool={prop.returns_pool} per_token={prop.distributed_per}"
+            )
+        self.stdout.write(f"✅ Synced at block {block} ({len(changed)} changed)")
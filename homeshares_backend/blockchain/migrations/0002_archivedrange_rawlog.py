@@ -0,0 +1,40 @@
+# Generated by Django 5.2.4 on 2026-10-19 14:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedRange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('address', models.CharField(max_length=42)),
+                ('from_block', models.BigIntegerField()),
+                ('to_block', models.BigIntegerField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['address', 'to_block'], name='blockchain__address_03a26a_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='RawLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('address', models.CharField(max_length=42)),
+                ('block_number', models.BigIntegerField()),
+                ('log_index', models.PositiveIntegerField()),
+                ('tx_hash', models.CharField(max_length=66)),
+                ('topics', models.TextField()),
+                ('data', models.TextField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('address', 'block_number', 'log_index'), name='unique_raw_log')],
+            },
+        ),
+    ]
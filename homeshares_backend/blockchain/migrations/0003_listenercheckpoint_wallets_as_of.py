@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 14:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain', '0002_archivedrange_rawlog'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listenercheckpoint',
+            name='wallets_as_of',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-19 14:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain', '0003_listenercheckpoint_wallets_as_of'),
+        ('properties', '0005_property_synced_at_block'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingContribution',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('investor', models.CharField(db_index=True, max_length=42)),
+                ('amount', models.DecimalField(decimal_places=18, max_digits=30)),
+                ('currency', models.CharField(default='MON', max_length=20)),
+                ('tx_hash', models.CharField(max_length=66, unique=True)),
+                ('block_number', models.BigIntegerField()),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='properties.property')),
+            ],
+        ),
+    ]
@@ -1,3 +1,89 @@
 from django.db import models
+from properties.models import Property
 
-# Create your models here.
+
+class ListenerWorker(models.Model):
+    """A running listener process; stale rows mean the process is gone."""
+    worker_id    = models.CharField(max_length=100, unique=True)
+    heartbeat_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.worker_id} @ {self.heartbeat_at:%H:%M:%S}"
+
+
+class ListenerLease(models.Model):
+    """Ownership of one shard of crowdfund addresses (property pk % shard count)."""
+    shard      = models.PositiveIntegerField(unique=True)
+    owner      = models.CharField(max_length=100, blank=True, default='')
+    expires_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"shard {self.shard} → {self.owner or '—'}"
+
+
+class ListenerCheckpoint(models.Model):
+    """Last block scanned for a property, so another worker can resume it."""
+    property     = models.OneToOneField(Property, on_delete=models.CASCADE)
+    block_number = models.BigIntegerField()
+    # With wallet-filtered scanning: newest Profile.updated_at covered so far (null = all wallets)
+    wallets_as_of = models.DateTimeField(null=True, blank=True)
+    updated_at   = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.property.symbol} @ {self.block_number}"
+
+
+class RawLog(models.Model):
+    """
+    Append-only copy of every contribution log fetched from the RPC.
+
+    Topics and data are stored as hex so `reindex` can rebuild investments
+    without touching the chain.
+    """
+    address      = models.CharField(max_length=42)
+    block_number = models.BigIntegerField()
+    log_index    = models.PositiveIntegerField()
+    tx_hash      = models.CharField(max_length=66)
+    topics       = models.TextField()  # comma-separated hex topics
+    data         = models.TextField()  # hex payload
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['address', 'block_number', 'log_index'], name='unique_raw_log'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.address} #{self.block_number}:{self.log_index}"
+
+
+class ArchivedRange(models.Model):
+    """Inclusive block range whose contribution logs are fully in RawLog."""
+    address    = models.CharField(max_length=42)
+    from_block = models.BigIntegerField()
+    to_block   = models.BigIntegerField()
+
+    class Meta:
+        indexes = [models.Index(fields=['address', 'to_block'])]
+
+    def __str__(self):
+        return f"{self.address} {self.from_block} → {self.to_block}"
+
+
+class PendingContribution(models.Model):
+    """
+    A contribution from a wallet no Profile owns yet.
+
+    Moved into Investment as soon as a profile links the wallet, so late
+    registrations don't need a chain rescan.
+    """
+    investor     = models.CharField(max_length=42, db_index=True)  # lowercase
+    property     = models.ForeignKey(Property, on_delete=models.CASCADE)
+    amount       = models.DecimalField(max_digits=30, decimal_places=18)
+    currency     = models.CharField(max_length=20, default='MON')
+    tx_hash      = models.CharField(max_length=66, unique=True)
+    block_number = models.BigIntegerField()
+
+    def __str__(self):
+        return f"{self.investor} → {self.amount} {self.currency} in {self.property.symbol}"
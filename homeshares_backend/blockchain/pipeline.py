@@ -0,0 +1,212 @@
+# homeshares_backend/blockchain/pipeline.py
+import heapq
+import os
+import queue
+import threading
+import time
+from django.db import connections
+
+PIPELINE_QUEUE_SIZE     = int(os.getenv("PIPELINE_QUEUE_SIZE", "4"))      # items buffered before each stage
+PIPELINE_FETCH_WORKERS  = int(os.getenv("PIPELINE_FETCH_WORKERS", "2"))   # concurrent RPC fetches
+PIPELINE_DECODE_WORKERS = int(os.getenv("PIPELINE_DECODE_WORKERS", "1"))  # decode / wallet prep threads
+
+_DONE = object()
+
+
+class Stage:
+    """
+    One step of a Pipeline: `func(item)` returns the item for the next stage.
+
+    Returning None drops the item. An `ordered` stage sees items in the order
+    they were put into the pipeline, whatever order upstream workers finish in;
+    it must run with a single worker. `flush` runs once after the last item.
+    """
+
+    def __init__(self, name, func, workers=1, queue_size=PIPELINE_QUEUE_SIZE,
+                 ordered=False, flush=None):
+        if ordered and workers != 1:
+            raise ValueError(f"Ordered stage {name!r} needs exactly one worker")
+        self.name     = name
+        self.func     = func
+        self.workers  = workers
+        self.ordered  = ordered
+        self.flush    = flush
+        self.inbox    = queue.Queue(maxsize=queue_size)
+
+        self.items    = 0
+        self.busy     = 0.0  # seconds spent in func
+        self.blocked  = 0.0  # seconds waiting on a full downstream queue
+        self.max_depth = 0
+        self.lock     = threading.Lock()
+
+
+class Pipeline:
+    """
+    Threaded stages connected by bounded queues.
+
+    `put()` blocks once `capacity` items are in flight (queued, being worked
+    on, or parked in an ordered stage's reorder buffer), so a slow stage or a
+    single stalled item throttles everything upstream and memory stays bounded.
+    `close()` drains every queue, runs each stage's flush and joins the
+    threads. `stats()` reports how busy each stage was.
+
+    A stage that raises stops the pipeline: items put after the failed one
+    pass through unprocessed, `put()` refuses new ones and `close()` re-raises
+    the error, so nothing from the failed item on is committed and a rerun
+    resumes before it.
+    """
+
+    def __init__(self, *stages, stderr=None):
+        self.stages  = stages
+        self.stderr  = stderr
+        self.threads = []
+        self.seq     = 0
+        self.started = None
+        self.elapsed = None
+        self.closed  = False
+        self.error   = None
+        self.failed_seq = None  # earliest item that raised
+        self.lock    = threading.Lock()
+        # One slot per queue entry or worker; freed once the last stage is done with the item
+        self.capacity = sum(s.inbox.maxsize + s.workers for s in stages)
+        self.slots   = threading.BoundedSemaphore(self.capacity)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start(self):
+        self.started = time.monotonic()
+        for i, stage in enumerate(self.stages):
+            nxt  = self.stages[i + 1] if i + 1 < len(self.stages) else None
+            left = [stage.workers]
+            for n in range(stage.workers):
+                t = threading.Thread(
+                    target=self._work, args=(stage, nxt, left),
+                    name=f"pipeline-{stage.name}-{n}", daemon=True,
+                )
+                t.start()
+                self.threads.append(t)
+
+    @property
+    def failed(self):
+        return self.error is not None
+
+    def put(self, item):
+        """Queue an item; returns False (and drops it) once a stage has failed."""
+        if self.failed:
+            return False
+        self.slots.acquire()
+        if self.failed:  # failed while we waited for a slot
+            self.slots.release()
+            return False
+        self.stages[0].inbox.put((self.seq, item))
+        self.seq += 1
+        return True
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            for _ in range(self.stages[0].workers):
+                self.stages[0].inbox.put(_DONE)
+            for t in self.threads:
+                t.join()
+            self.elapsed = time.monotonic() - self.started
+        if self.error is not None:
+            raise self.error
+
+    def _work(self, stage, nxt, left):
+        pending, expected = [], 0  # reorder buffer for ordered stages
+        while True:
+            entry = stage.inbox.get()
+            with stage.lock:
+                stage.max_depth = max(stage.max_depth, stage.inbox.qsize() + 1)
+            if entry is _DONE:
+                break
+
+            if stage.ordered:
+                heapq.heappush(pending, entry)
+                ready = []
+                while pending and pending[0][0] == expected:
+                    ready.append(heapq.heappop(pending))
+                    expected += 1
+            else:
+                ready = [entry]
+
+            for seq, item in ready:
+                self._handle(stage, nxt, seq, item)
+
+        # Last worker out flushes and passes the shutdown on
+        with stage.lock:
+            left[0] -= 1
+            last = left[0] == 0
+        if last:
+            # Only items ahead of a failure were processed, so flushing is safe
+            if stage.flush:
+                try:
+                    stage.flush()
+                except Exception as e:
+                    self._fail(stage, e, self.seq)
+            if nxt:
+                for _ in range(nxt.workers):
+                    nxt.inbox.put(_DONE)
+        connections.close_all()  # this thread's DB connections only
+
+    def _handle(self, stage, nxt, seq, item):
+        # Dropped items still travel on (as None) so ordered stages don't stall on the gap
+        out = None
+        if item is not None and not self._behind_failure(seq):
+            started = time.monotonic()
+            try:
+                out = stage.func(item)
+            except Exception as e:
+                self._fail(stage, e, seq)
+            with stage.lock:
+                stage.busy  += time.monotonic() - started
+                stage.items += 1
+        if nxt:
+            started = time.monotonic()
+            nxt.inbox.put((seq, out))
+            with stage.lock:
+                stage.blocked += time.monotonic() - started
+        else:
+            self.slots.release()
+
+    def _behind_failure(self, seq):
+        failed = self.failed_seq
+        return failed is not None and seq >= failed
+
+    def _fail(self, stage, e, seq):
+        # The earliest failed item wins; everything from it on is dropped
+        with self.lock:
+            if self.failed_seq is None or seq < self.failed_seq:
+                self.error, self.failed_seq = e, seq
+        if self.stderr is not None:
+            self.stderr.write(f"  ❌ {stage.name} stage failed, stopping pipeline: {e}")
+
+    def stats(self):
+        wall = self.elapsed or (time.monotonic() - self.started)
+        return [
+            {
+                "stage":     s.name,
+                "workers":   s.workers,
+                "items":     s.items,
+                "busy":      s.busy / (wall * s.workers) if wall else 0.0,
+                "blocked":   s.blocked / (wall * s.workers) if wall else 0.0,
+                "max_queue": s.max_depth,
+                "queue_size": s.inbox.maxsize,
+            }
+            for s in self.stages
+        ]
+
+    def report(self, stdout):
+        stdout.write("📊 Pipeline utilisation:")
+        for s in self.stats():
+            stdout.write(
+                f"  {s['stage']:<8} x{s['workers']}  {s['items']:>6} items  "
+                f"busy {s['busy']:>4.0%}  blocked {s['blocked']:>4.0%}  "
+                f"queue peak {s['max_queue']}/{s['queue_size']}"
+            )
@@ -0,0 +1,26 @@
+# homeshares_backend/blockchain/preload.py
+import os
+
+PRELOAD_CHAIN = os.getenv("PRELOAD_CHAIN") == "1"  # warm the chain stack at app load
+
+
+def warm():
+    """
+    Import web3 and build the ABI / log decoder caches once.
+
+    Called from wsgi.py / asgi.py when PRELOAD_CHAIN=1. Under a pre-forking
+    server started with app preloading (e.g. ``gunicorn --preload``) this runs
+    in the master, so every forked worker starts with the work already done.
+    """
+    from web3 import Web3
+    from blockchain.events import CONTRIBUTION_TOPIC, TOKEN_CONTRIBUTION_TOPIC, decode_contribution
+    from blockchain.rpc import ResilientHTTPProvider  # noqa: F401 — provider + requests stack
+    from blockchain.abi import load_crowdfund_abi
+
+    # Contract factory parses the ABI and resolves its function/event codecs
+    Web3().eth.contract(abi=load_crowdfund_abi())
+
+    # eth_abi caches a decoder per type signature on first use
+    word = "0x" + "00" * 32
+    decode_contribution([CONTRIBUTION_TOPIC, word], word)
+    decode_contribution([TOKEN_CONTRIBUTION_TOPIC, word], word + "00" * 32)
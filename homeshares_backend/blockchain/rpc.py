@@ -0,0 +1,248 @@
+# homeshares_backend/blockchain/rpc.py
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+from web3 import Web3
+from web3.providers.base import JSONBaseProvider
+
+RPC_TIMEOUT    = float(os.getenv("RPC_TIMEOUT", "30"))     # seconds per request
+RPC_RATE_LIMIT = float(os.getenv("RPC_RATE_LIMIT", "0"))   # requests/s per endpoint, 0 = unlimited
+RPC_HEDGE      = os.getenv("RPC_HEDGE") == "1"             # duplicate slow reads to a 2nd endpoint
+RPC_POOL_SIZE  = int(os.getenv("RPC_POOL_SIZE", "10"))     # keep-alive connections per endpoint
+
+# Reads that many callers ask at once; identical in-flight requests share one call
+COALESCED_METHODS = {"eth_blockNumber", "eth_chainId", "net_version", "eth_gasPrice"}
+# Never duplicated by hedging, and not retried elsewhere after a timeout
+WRITE_METHODS     = {"eth_sendRawTransaction", "eth_sendTransaction"}
+# JSON-RPC error codes providers use for throttling / overload
+RETRYABLE_CODES   = {-32005, -32016, 429}
+
+RETRYABLE_ERRORS = (requests.ConnectionError, requests.Timeout, requests.HTTPError)
+
+
+def rpc_urls(default=None):
+    """Endpoints from MONAD_RPC_URLS (comma-separated), else MONAD_RPC_URL."""
+    raw = os.getenv("MONAD_RPC_URLS") or os.getenv("MONAD_RPC_URL") or default or ""
+    return [u.strip().rstrip("/") for u in raw.split(",") if u.strip()]
+
+
+class Endpoint:
+    """One RPC URL with its own pooled session, latency window, breaker and rate limit."""
+
+    def __init__(self, url, rate_limit=RPC_RATE_LIMIT, pool_size=RPC_POOL_SIZE):
+        self.url        = url
+        self.rate_limit = rate_limit
+        self.session    = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.latencies  = deque(maxlen=200)
+        self.failures   = 0
+        self.down_until = 0.0
+        self.tokens     = max(rate_limit, 1.0)
+        self.refilled   = time.monotonic()
+        self.lock       = threading.Lock()
+
+    def __repr__(self):
+        return f"<Endpoint {self.url} p95={self.p95():.3f}s failures={self.failures}>"
+
+    def healthy(self):
+        return time.monotonic() >= self.down_until
+
+    def p95(self, default=1.0):
+        with self.lock:
+            samples = sorted(self.latencies)
+        if not samples:
+            return default
+        return samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+    def score(self):
+        with self.lock:
+            samples = list(self.latencies)[-20:]
+        recent = sum(samples) / len(samples) if samples else 0.0
+        return (not self.healthy(), recent)
+
+    def throttle(self):
+        # Token bucket: `rate_limit` tokens per second, burst of the same size
+        if not self.rate_limit:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    max(self.rate_limit, 1.0),
+                    self.tokens + (now - self.refilled) * self.rate_limit,
+                )
+                self.refilled = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_for = (1 - self.tokens) / self.rate_limit
+            time.sleep(wait_for)
+
+    def record_success(self, latency):
+        with self.lock:
+            self.latencies.append(latency)
+            self.failures = 0
+
+    def record_failure(self):
+        # Exponential back-off before the endpoint is tried first again (max 60s)
+        with self.lock:
+            self.failures  += 1
+            self.down_until = time.monotonic() + min(60, 2 ** self.failures)
+
+
+class ResilientHTTPProvider(JSONBaseProvider):
+    """
+    web3 provider over several HTTP endpoints.
+
+    Requests go to the healthiest endpoint and fail over on connection errors,
+    HTTP errors and throttling responses. Slow reads can be hedged to a second
+    endpoint once the first exceeds its p95 latency, and identical in-flight
+    calls in COALESCED_METHODS share a single request.
+    """
+
+    def __init__(self, urls, timeout=RPC_TIMEOUT, rate_limit=RPC_RATE_LIMIT,
+                 hedge=RPC_HEDGE, pool_size=RPC_POOL_SIZE, **kwargs):
+        super().__init__(**kwargs)
+        if not urls:
+            raise ValueError("ResilientHTTPProvider needs at least one endpoint")
+        self.endpoints = [Endpoint(u, rate_limit, pool_size) for u in urls]
+        self.timeout   = timeout
+        self.hedge     = hedge and len(self.endpoints) > 1
+        self.headers   = {"Content-Type": "application/json"}
+        self.inflight  = {}
+        self.lock      = threading.Lock()
+        self.pool      = ThreadPoolExecutor(max_workers=4, thread_name_prefix="rpc-hedge") if self.hedge else None
+
+    def __str__(self):
+        return f"RPC connection {', '.join(ep.url for ep in self.endpoints)}"
+
+    def make_request(self, method, params):
+        if method in COALESCED_METHODS:
+            return self._coalesced(method, params)
+        return self._dispatch(method, params)
+
+    def make_batch_request(self, requests_):
+        # One JSON-RPC batch on the healthiest endpoint, failing over as a whole
+        data  = self.encode_batch_rpc_request(requests_)
+        error = None
+        for ep in self._ranked():
+            try:
+                response = self._send(ep, data)
+            except RETRYABLE_ERRORS as e:
+                error = e
+                continue
+            if not isinstance(response, list):
+                return response  # the whole batch was rejected
+            return sorted(response, key=lambda r: r.get("id", 0))
+        raise error
+
+    def _coalesced(self, method, params):
+        key = (method, json.dumps(params, sort_keys=True, default=str))
+        with self.lock:
+            future = self.inflight.get(key)
+            owner  = future is None
+            if owner:
+                future = self.inflight[key] = Future()
+        if not owner:
+            return future.result()
+        try:
+            response = self._dispatch(method, params)
+            future.set_result(response)
+            return response
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                self.inflight.pop(key, None)
+
+    def _ranked(self):
+        return sorted(self.endpoints, key=Endpoint.score)
+
+    def _dispatch(self, method, params):
+        data  = self.encode_rpc_request(method, params)
+        order = self._ranked()
+        if self.hedge and method not in WRITE_METHODS:
+            return self._hedged(order, data)
+
+        error = None
+        for ep in order:
+            try:
+                return self._send(ep, data)
+            except RETRYABLE_ERRORS as e:
+                error = e
+                if method in WRITE_METHODS and isinstance(e, requests.Timeout):
+                    raise  # the transaction may already be in a mempool
+        raise error
+
+    def _hedged(self, order, data):
+        primary, backup, rest = order[0], order[1], order[2:]
+        first = self.pool.submit(self._send, primary, data)
+        done, _ = wait([first], timeout=primary.p95(default=self.timeout))
+        if done and first.exception() is None:
+            return first.result()
+
+        # Primary is slow (or failed fast): race it against the backup
+        racing = [f for f in (first,) if not f.done()]
+        racing.append(self.pool.submit(self._send, backup, data))
+        error = first.exception() if first.done() else None
+        while racing:
+            done, pending = wait(racing, return_when=FIRST_COMPLETED)
+            for f in done:
+                if f.exception() is None:
+                    return f.result()
+                error = f.exception()
+            racing = list(pending)
+
+        for ep in rest:
+            try:
+                return self._send(ep, data)
+            except RETRYABLE_ERRORS as e:
+                error = e
+        raise error
+
+    def _send(self, ep, data):
+        ep.throttle()
+        started = time.monotonic()
+        try:
+            resp = ep.session.post(ep.url, data=data, headers=self.headers, timeout=self.timeout)
+            resp.raise_for_status()
+            response = self.decode_rpc_response(resp.content)
+            error = response.get("error") if isinstance(response, dict) else None
+            if error and error.get("code") in RETRYABLE_CODES:
+                raise requests.HTTPError(f"{ep.url} throttled: {error.get('message')}")
+        except RETRYABLE_ERRORS:
+            ep.record_failure()
+            raise
+        ep.record_success(time.monotonic() - started)
+        return response
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_web3(timeout=RPC_TIMEOUT, urls=None, default_url=None):
+    """
+    Shared Web3 client for the configured endpoints.
+
+    Clients are cached per (endpoints, timeout), so every caller in a process
+    reuses the same keep-alive pools, health stats and rate limits.
+    """
+    urls = tuple(urls or rpc_urls(default_url))
+    if not urls:
+        raise ValueError("MONAD_RPC_URL / MONAD_RPC_URLS not set")
+    key = (urls, timeout)
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = Web3(ResilientHTTPProvider(list(urls), timeout=timeout))
+        return _clients[key]
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from users.models import Profile
+from .ingest import attach_pending
+
+@receiver(post_save, sender=Profile)
+def claim_pending_contributions(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    # A new or re-linked wallet picks up contributions parked before it registered
+    if raw or (update_fields is not None and "wallet_address" not in update_fields):
+        return
+    if instance.wallet_address:
+        attach_pending({instance.wallet_address: instance.user})
@@ -0,0 +1,100 @@
+# homeshares_backend/blockchain/state.py
+import os
+from eth_utils import from_wei, function_signature_to_4byte_selector
+from properties.models import Property
+
+SYNC_BATCH_CALLS = int(os.getenv("SYNC_BATCH_CALLS", "100"))  # eth_calls per JSON-RPC batch
+
+SYNCED_FIELDS = ["closed", "returns_pool", "distributed_per"]
+
+
+def _selector(signature):
+    return "0x" + function_signature_to_4byte_selector(signature).hex()
+
+
+# Deployed crowdfunds expose either the current getters or the older isClosed();
+# the first one that answers wins
+GETTERS = {
+    "closed":          [_selector("closed()"), _selector("isClosed()")],
+    "returns_pool":    [_selector("returnsPool()")],
+    "distributed_per": [_selector("returnsPerToken()")],
+}
+
+
+def _word(response):
+    result = response.get("result") if "error" not in response else None
+    if not result or result == "0x":
+        return None  # reverted / missing getter
+    return int(result, 16)
+
+
+def read_states(w3, props, block_number, batch_calls=SYNC_BATCH_CALLS):
+    """
+    {property pk: {field: value}} for every crowdfund at one block.
+
+    All getters go out as batched eth_calls pinned to `block_number`, so the
+    snapshot is consistent across properties. Fields whose getters all revert
+    are left out.
+    """
+    calls = [
+        (prop.pk, field, selector, prop.crowdfund_address)
+        for prop in props
+        for field, selectors in GETTERS.items()
+        for selector in selectors
+    ]
+    block = hex(block_number)
+
+    states = {prop.pk: {} for prop in props}
+    for i in range(0, len(calls), batch_calls):
+        chunk = calls[i:i + batch_calls]
+        responses = w3.provider.make_batch_request([
+            ("eth_call", [{"to": address, "data": selector}, block])
+            for _, _, selector, address in chunk
+        ])
+        if not isinstance(responses, list):
+            raise RuntimeError(f"Batch eth_call rejected: {responses.get('error')}")
+        # The provider sorts replies by id; a short reply would shift every value after the gap
+        if len(responses) != len(chunk):
+            raise RuntimeError(f"Batch eth_call returned {len(responses)} of {len(chunk)} replies")
+
+        for (pk, field, _, _), response in zip(chunk, responses):
+            value = _word(response)
+            if value is None or field in states[pk]:
+                continue
+            if field == "closed":
+                states[pk][field] = bool(value)
+            else:
+                states[pk][field] = from_wei(value, "ether")  # wei / 1e18-scaled
+    return states
+
+
+def sync_states(w3, props=None, block_number=None):
+    """
+    Write on-chain closed / returns_pool / distributed_per back to Property.
+
+    Only rows whose values changed are updated; `synced_at_block` is stamped
+    on every property that answered. Returns (block, changed properties).
+    """
+    props = list(Property.objects.all() if props is None else props)
+    if block_number is None:
+        block_number = w3.eth.block_number
+    states = read_states(w3, props, block_number)
+
+    changed, fields, synced = [], set(), []
+    for prop in props:
+        state = states[prop.pk]
+        if not state:
+            continue
+        synced.append(prop.pk)
+        diff = [f for f, value in state.items() if getattr(prop, f) != value]
+        if diff:
+            for f in diff:
+                setattr(prop, f, state[f])
+            fields.update(diff)
+            changed.append(prop)
+
+    if changed:
+        Property.objects.bulk_update(changed, sorted(fields))
+    if synced:
+        Property.objects.filter(pk__in=synced).update(synced_at_block=block_number)
+    return block_number, changed
@@ -1,3 +1,1061 @@
-from django.test import TestCase
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from unittest import mock
+import requests
+from requests.exceptions import ReadTimeout
+from eth_utils import function_signature_to_4byte_selector
+from hexbytes import HexBytes
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import OperationalError, connection, connections
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from properties.models import Property, Investment
+from .archive import archive_logs
+from .events import CONTRIBUTION_TOPIC
+from .ingest import InvestmentSink
+from .leases import ShardLeaser, fair_share, save_checkpoints
+from .management.commands import listen_contributions, poll_listen
+from .models import ListenerCheckpoint, ListenerLease, PendingContribution
+from .pipeline import Pipeline, Stage
+from .rpc import ResilientHTTPProvider
+from .state import read_states, sync_states
+from .wallets import WalletFilter, address_topic, topic_chunks
 
-# Create your tests here.
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def wallet(n):
+    return f"0x{n:040x}"
+
+
+def make_property(n=1, **fields):
+    return Property.objects.create(
+        name=f"Property {n}", symbol=f"P{n}", crowdfund_address=wallet(0xC0FFEE00 + n),
+        goal=Decimal("100"), **fields,
+    )
+
+
+def make_investor(n):
+    user = User.objects.create(username=f"investor{n}")
+    user.profile.wallet_address = wallet(n)
+    user.profile.save()
+    return user
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class SinkConcurrencyTests(TransactionTestCase):
+    """Listener flushes in one thread while web readers query in others (WAL profile)."""
+
+    WRITES  = 40   # flushes
+    BATCH   = 25   # rows per flush
+    READERS = 4
+
+    def setUp(self):
+        self.prop = make_property()
+        for n in range(1, 11):
+            make_investor(n)
+
+    def test_flushes_and_reads_never_hit_database_is_locked(self):
+        if connection.vendor == 'sqlite':
+            mode = connection.cursor().execute('PRAGMA journal_mode').fetchone()[0]
+            self.assertEqual(mode, 'wal')
+
+        errors  = []
+        writing = threading.Event()
+        writing.set()
+
+        def writer():
+            try:
+                sink = InvestmentSink(batch_size=self.BATCH)
+                for i in range(self.WRITES * self.BATCH):
+                    sink.add(
+                        self.prop, wallet(i % 10 + 1), Decimal("1"), "MON",
+                        f"0x{i:064x}", 1000 + i,
+                    )
+                sink.flush()
+            except OperationalError as e:
+                errors.append(e)
+            finally:
+                writing.clear()
+                connections.close_all()
+
+        def reader():
+            try:
+                while writing.is_set():
+                    Investment.objects.filter(property=self.prop).count()
+                    list(Property.objects.filter(investment__user__username="investor1").distinct())
+            except OperationalError as e:
+                errors.append(e)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=writer)] + [
+            threading.Thread(target=reader) for _ in range(self.READERS)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=120)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(Investment.objects.count(), self.WRITES * self.BATCH)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class PendingContributionTests(TestCase):
+
+    def setUp(self):
+        self.prop = make_property()
+        self.sink = InvestmentSink()
+
+    def park(self, n, tx, amount="1"):
+        self.sink.add(self.prop, wallet(n).upper().replace("0X", "0x"), Decimal(amount), "MON", tx, 10)
+
+    def test_unknown_wallet_is_parked_once(self):
+        self.park(1, "0xa")
+        self.park(1, "0xa")  # same tx twice in one batch
+        self.assertEqual(self.sink.flush(), [])
+        self.park(1, "0xa")  # and again in a later batch
+        self.sink.flush()
+
+        row = PendingContribution.objects.get()
+        self.assertEqual((row.investor, row.tx_hash), (wallet(1), "0xa"))
+        self.assertFalse(Investment.objects.exists())
+
+    def test_linking_the_wallet_claims_parked_rows(self):
+        self.park(1, "0xa", "2")
+        self.park(1, "0xb", "3")
+        self.park(2, "0xc")
+        self.sink.flush()
+
+        user = make_investor(1)  # saves the profile with its wallet
+        self.assertEqual(
+            sorted(Investment.objects.filter(user=user).values_list("tx_hash", "amount")),
+            [("0xa", Decimal("2")), ("0xb", Decimal("3"))],
+        )
+        self.assertEqual(list(PendingContribution.objects.values_list("tx_hash", flat=True)), ["0xc"])
+
+    def test_saves_that_skip_wallet_address_do_not_attach(self):
+        self.park(1, "0xa")
+        self.sink.flush()
+        user = User.objects.create(username="late")
+        user.profile.wallet_address = wallet(1)
+        # Only updated_at is written, so the wallet isn't linked in the DB yet
+        user.profile.save(update_fields=["updated_at"])
+        self.assertFalse(Investment.objects.exists())
+        self.assertEqual(PendingContribution.objects.count(), 1)
+
+        user.profile.save(update_fields=["wallet_address"])
+        self.assertEqual(Investment.objects.get().user, user)
+        self.assertFalse(PendingContribution.objects.exists())
+
+    def test_import_investors_attaches_per_chunk(self):
+        for n in range(5):
+            self.park(n, f"0x{n}")
+        self.sink.flush()
+
+        fd, path = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(fd, "w") as f:
+            f.write("username,wallet\n" + "".join(f"investor{n},{wallet(n)}\n" for n in range(5)))
+        self.addCleanup(os.remove, path)
+
+        out = StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command("import_investors", path, "--chunk-size", "2", stdout=out, stderr=StringIO())
+
+        # bulk_create skips post_save, so the command claims each chunk's rows itself
+        deletes = [q["sql"] for q in queries if q["sql"].startswith('DELETE FROM "blockchain_pendingcontribution"')]
+        self.assertEqual(len(deletes), 3)
+        self.assertFalse(PendingContribution.objects.exists())
+        self.assertEqual(
+            sorted(Investment.objects.values_list("user__username", "tx_hash")),
+            [(f"investor{n}", f"0x{n}") for n in range(5)],
+        )
+        self.assertIn("Attached 5 previously unmatched contributions", out.getvalue())
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class CheckpointTests(TestCase):
+
+    def setUp(self):
+        self.props = [make_property(n) for n in range(1, 5)]
+
+    def test_checkpoint_never_moves_backwards(self):
+        prop = self.props[0]
+        save_checkpoints({prop: (500, None)})
+        save_checkpoints({prop: (300, None)})
+        self.assertEqual(ListenerCheckpoint.objects.get(property=prop).block_number, 500)
+        save_checkpoints({prop: (700, None)})
+        self.assertEqual(ListenerCheckpoint.objects.get(property=prop).block_number, 700)
+
+    def test_only_shards_still_leased_are_checkpointed(self):
+        leaser = ShardLeaser(2, worker_id="slow")
+        leaser.heartbeat()
+        self.assertEqual(leaser.owned, {0, 1})
+
+        # Our lease on shard 1 ran out and another worker took it over
+        ListenerLease.objects.filter(shard=1).update(
+            owner="fast", expires_at=timezone.now() + timedelta(seconds=30)
+        )
+        written = save_checkpoints({p: (900, None) for p in self.props}, leaser=leaser)
+
+        self.assertEqual({p.pk % 2 for p in written}, {0})
+        lost = [p for p in self.props if p.pk % 2]
+        self.assertFalse(ListenerCheckpoint.objects.filter(property__in=lost).exists())
+
+
+class FairShareTests(TestCase):
+
+    def settle(self, leasers, rounds=4):
+        # Everyone heartbeats in turn until surplus has moved to newcomers
+        for _ in range(rounds):
+            for leaser in leasers:
+                leaser.heartbeat()
+        return [sorted(leaser.owned) for leaser in leasers]
+
+    def test_fair_share_spreads_the_remainder(self):
+        live = ["a", "b", "c"]
+        self.assertEqual([fair_share(4, live, w) for w in live], [2, 1, 1])
+        self.assertEqual([fair_share(3, live, w) for w in live], [1, 1, 1])
+        self.assertEqual(fair_share(4, ["a", "b"], "c"), 1)  # not registered yet
+
+    def test_every_worker_gets_a_shard_when_one_more_joins(self):
+        # 4 shards: ceil(4/3) = 2 used to leave the third worker idle
+        leasers = [ShardLeaser(4, worker_id=w) for w in ("a", "b")]
+        self.assertEqual(self.settle(leasers), [[0, 1], [2, 3]])
+
+        leasers.append(ShardLeaser(4, worker_id="c"))
+        owned = self.settle(leasers)
+        self.assertEqual([len(o) for o in owned], [2, 1, 1])
+        self.assertEqual(sorted(sum(owned, [])), [0, 1, 2, 3])
+
+    def test_more_workers_than_shards_keeps_a_standby(self):
+        leasers = [ShardLeaser(4, worker_id=w) for w in "abcde"]
+        owned = self.settle(leasers)
+        self.assertEqual([len(o) for o in owned], [1, 1, 1, 1, 0])
+        self.assertEqual(sorted(sum(owned, [])), [0, 1, 2, 3])
+
+        # The standby takes over when a worker leaves
+        leasers[0].release()
+        owned = self.settle(leasers[1:])
+        self.assertEqual([len(o) for o in owned], [1, 1, 1, 1])
+
+
+class LeaseHeartbeatTests(TransactionTestCase):
+
+    def test_background_heartbeat_outlives_a_slow_round(self):
+        leaser = ShardLeaser(2, worker_id="busy", ttl=1)
+        leaser.heartbeat()
+        leaser.start(interval=0.2)
+        try:
+            # A polling round far longer than the TTL: nobody else may take over
+            time.sleep(2.5)
+            self.assertEqual(leaser.confirmed(), {0, 1})
+            rival = ShardLeaser(2, worker_id="rival", ttl=1)
+            self.assertEqual(rival.heartbeat(), set())
+        finally:
+            leaser.release()
+        self.assertFalse(ListenerLease.objects.exclude(owner="").exists())
+
+
+class PipelineTests(SimpleTestCase):
+
+    def run_pipeline(self, fail_on, items=6):
+        commits, flushed = [], []
+
+        def fetch(n):
+            time.sleep(0.01 * (items - n))  # later items finish first
+            if n == fail_on:
+                raise RuntimeError(f"window {n} failed")
+            return n
+
+        pipeline = Pipeline(
+            Stage("fetch", fetch, workers=3),
+            Stage("persist", lambda n: commits.append(n) or n,
+                  ordered=True, flush=lambda: flushed.append(True)),
+        )
+        pipeline.start()
+        refused = [n for n in range(items) if not pipeline.put(n)]
+        return pipeline, commits, flushed, refused
+
+    def test_commits_in_order(self):
+        pipeline, commits, flushed, _ = self.run_pipeline(fail_on=None)
+        pipeline.close()
+        self.assertEqual(commits, [0, 1, 2, 3, 4, 5])
+        self.assertEqual(flushed, [True])
+
+    def test_failed_item_stops_later_commits_and_close_raises(self):
+        pipeline, commits, flushed, _ = self.run_pipeline(fail_on=1)
+        with self.assertRaisesMessage(RuntimeError, "window 1 failed"):
+            pipeline.close()
+        # Nothing at or after the failed window, so a rerun resumes before it
+        self.assertEqual(commits, [0])
+        # The flush still commits what was buffered from items ahead of the failure
+        self.assertEqual(flushed, [True])
+
+    def test_put_refuses_items_after_a_failure(self):
+        pipeline = Pipeline(Stage("boom", lambda n: 1 / 0))
+        pipeline.start()
+        pipeline.put(0)
+        deadline = time.monotonic() + 5
+        while not pipeline.failed and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertFalse(pipeline.put(1))
+        with self.assertRaises(ZeroDivisionError):
+            pipeline.close()
+
+    def test_put_blocks_while_the_first_item_stalls(self):
+        release, commits, queued = threading.Event(), [], []
+
+        def fetch(n):
+            if n == 0:
+                release.wait(5)
+            return n
+
+        pipeline = Pipeline(
+            Stage("fetch", fetch, workers=2, queue_size=1),
+            Stage("persist", commits.append, ordered=True, queue_size=1),
+        )
+        pipeline.start()
+
+        def produce():
+            for n in range(20):
+                pipeline.put(n)
+                queued.append(n)
+
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+        time.sleep(0.3)
+        # Later items finished, but they wait behind item 0 and hold their slots
+        self.assertEqual(len(queued), pipeline.capacity)
+        self.assertTrue(producer.is_alive())
+        self.assertEqual(commits, [])
+
+        release.set()
+        producer.join(5)
+        pipeline.close()
+        self.assertEqual(commits, list(range(20)))
+
+
+class FetchWindowTests(SimpleTestCase):
+
+    def setUp(self):
+        self.cmd = listen_contributions.Command(stdout=StringIO(), stderr=StringIO())
+        self.cmd.w3 = mock.Mock()
+        self.prop = mock.Mock(symbol="LGH", crowdfund_address=wallet(0xC0FFEE))
+
+    def get_logs_failing_at(self, bad_block, exc):
+        def get_logs(params):
+            if params["fromBlock"] <= bad_block <= params["toBlock"]:
+                raise exc
+            return []
+        return get_logs
+
+    def test_timeouts_split_the_window(self):
+        calls = []
+        def get_logs(params):
+            calls.append((params["fromBlock"], params["toBlock"]))
+            if params["toBlock"] - params["fromBlock"] > 3:
+                raise ReadTimeout("too wide")
+            return []
+        self.cmd.w3.eth.get_logs = get_logs
+        windows = self.cmd.fetch_window(self.prop, 0, 7)
+        self.assertEqual([(s, e) for s, e, _ in windows], [(0, 3), (4, 7)])
+
+    def test_a_block_that_keeps_timing_out_raises(self):
+        # Returning a gap here would let the windows after it commit, and the
+        # next run would resume past the block without ever retrying it
+        self.cmd.w3.eth.get_logs = self.get_logs_failing_at(6, ReadTimeout("slow"))
+        with self.assertRaises(ReadTimeout):
+            self.cmd.fetch_window(self.prop, 0, 7)
+
+    def test_other_errors_raise(self):
+        self.cmd.w3.eth.get_logs = self.get_logs_failing_at(2, ValueError("bad response"))
+        with self.assertRaisesMessage(ValueError, "bad response"):
+            self.cmd.fetch_window(self.prop, 0, 7)
+
+
+class GhostGraphListenTests(SimpleTestCase):
+
+    def test_missing_api_key_fails_the_command(self):
+        # A non-zero exit, so cron and supervisors notice the misconfiguration
+        with mock.patch.dict("os.environ", {"GHOSTGRAPH_API_KEY": ""}):
+            with self.assertRaisesMessage(CommandError, "GHOSTGRAPH_API_KEY"):
+                call_command("ghostgraph_listen", stdout=StringIO(), stderr=StringIO())
+
+
+def contribution_log(investor, wei, block, log_index=0):
+    return {
+        "blockNumber":     block,
+        "logIndex":        log_index,
+        "transactionHash": f"0x{block:064x}",
+        "topics":          [CONTRIBUTION_TOPIC, address_topic(investor)],
+        "data":            "0x" + f"{wei:064x}",
+    }
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ReindexTests(TestCase):
+
+    def setUp(self):
+        self.prop = make_property()
+        self.user = make_investor(1)
+
+    def invest(self, block, **fields):
+        return Investment.objects.create(
+            user=self.user, property=self.prop, amount=Decimal("1"),
+            tx_hash=f"0x{block:064x}", block_number=block, **fields,
+        )
+
+    def test_investments_outside_archived_ranges_survive(self):
+        # Recorded before archiving existed (or by another listener)
+        self.invest(100)
+        self.invest(200)
+        archive_logs(
+            self.prop.crowdfund_address, 300, 400,
+            [contribution_log(wallet(1), 2 * 10**18, 350)],
+        )
+
+        call_command("reindex", stdout=StringIO())
+
+        self.assertEqual(
+            list(Investment.objects.order_by("block_number").values_list("block_number", "amount")),
+            [(100, Decimal("1")), (200, Decimal("1")), (350, Decimal("2"))],
+        )
+
+    def test_rows_inside_archived_ranges_are_rebuilt(self):
+        # A stale row inside coverage that the archive doesn't back is dropped;
+        # distribution status carries over for rows that come back
+        self.invest(310)
+        self.invest(350, distributed=True)
+        archive_logs(self.prop.crowdfund_address, 300, 400, [contribution_log(wallet(1), 10**18, 350)])
+        archive_logs(self.prop.crowdfund_address, 500, 600, [])
+        self.invest(450)  # in the gap between the two ranges
+
+        call_command("reindex", stdout=StringIO())
+
+        self.assertEqual(
+            list(Investment.objects.order_by("block_number").values_list("block_number", "distributed")),
+            [(350, True), (450, False)],
+        )
+
+
+class RPCFault(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
+
+class MockRPC:
+    """
+    JSON-RPC endpoint on a local port with injectable latency and faults.
+
+    By default every call answers with `name` as its result, so tests can
+    tell which endpoint served it; pass `respond(method, params)` to act as a
+    chain instead (raise RPCFault for an error reply). Batch bodies get a
+    batch reply in reverse order, which the spec allows, so callers must
+    match responses by id. `calls` counts requests per method.
+    """
+
+    def __init__(self, name, delay=0.0, status=200, error=None, respond=None):
+        self.name    = name
+        self.delay   = delay
+        self.status  = status
+        self.error   = error  # JSON-RPC error object to return instead of a result
+        self.respond = respond
+        self.calls  = {}
+        self.lock   = threading.Lock()
+
+        mock = self
+
+        def answer(request):
+            reply = {"jsonrpc": "2.0", "id": request["id"]}
+            if mock.error:
+                reply["error"] = mock.error
+            elif mock.respond:
+                try:
+                    reply["result"] = mock.respond(request["method"], request.get("params", []))
+                except RPCFault as e:
+                    reply["error"] = {"code": e.code, "message": str(e)}
+            else:
+                reply["result"] = mock.name
+            return reply
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with mock.lock:
+                    for request in body if isinstance(body, list) else [body]:
+                        mock.calls[request["method"]] = mock.calls.get(request["method"], 0) + 1
+                time.sleep(mock.delay)
+                if isinstance(body, list):
+                    reply = [answer(request) for request in reversed(body)]
+                else:
+                    reply = answer(body)
+                payload = json.dumps(reply).encode()
+                try:
+                    self.send_response(mock.status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # client timed out and went away
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url    = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def count(self, method=None):
+        with self.lock:
+            return self.calls.get(method, 0) if method else sum(self.calls.values())
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class ResilientProviderTests(SimpleTestCase):
+
+    def mock(self, name, **kwargs):
+        m = MockRPC(name, **kwargs)
+        self.addCleanup(m.stop)
+        return m
+
+    def provider(self, *mocks, **kwargs):
+        kwargs.setdefault("timeout", 2)
+        kwargs.setdefault("rate_limit", 0)
+        kwargs.setdefault("hedge", False)
+        return ResilientHTTPProvider([m.url for m in mocks], **kwargs)
+
+    def test_fails_over_on_http_error(self):
+        down, up = self.mock("a", status=500), self.mock("b")
+        p = self.provider(down, up)
+        self.assertEqual(p.make_request("eth_getBalance", ["0x0", "latest"])["result"], "b")
+        self.assertEqual(down.count(), 1)
+
+    def test_fails_over_on_throttling_response(self):
+        busy = self.mock("a", error={"code": -32005, "message": "limit exceeded"})
+        up   = self.mock("b")
+        p = self.provider(busy, up)
+        self.assertEqual(p.make_request("eth_getBalance", ["0x0", "latest"])["result"], "b")
+
+    def test_breaker_skips_failed_endpoint_until_cooldown(self):
+        down, up = self.mock("a", status=500), self.mock("b")
+        p = self.provider(down, up)
+        p.make_request("eth_getBalance", ["0x0", "latest"])
+        self.assertFalse(p.endpoints[0].healthy())
+
+        # While open, the failed endpoint isn't tried first
+        for _ in range(3):
+            self.assertEqual(p.make_request("eth_getBalance", ["0x0", "latest"])["result"], "b")
+        self.assertEqual(down.count(), 1)
+
+        # Cool-down over and the endpoint recovered: it's back in rotation
+        down.status = 200
+        p.endpoints[0].down_until = 0
+        p.endpoints[1].latencies.extend([1.0] * 20)  # make the backup look slow
+        self.assertEqual(p.make_request("eth_getBalance", ["0x0", "latest"])["result"], "a")
+
+    def test_breaker_backs_off_exponentially(self):
+        down = self.mock("a", status=500)
+        p = self.provider(down)
+        for expected in (2, 4, 8):
+            with self.assertRaises(requests.HTTPError):
+                p.make_request("eth_getBalance", ["0x0", "latest"])
+            remaining = p.endpoints[0].down_until - time.monotonic()
+            self.assertAlmostEqual(remaining, expected, delta=0.5)
+
+    def test_hedges_to_backup_past_p95(self):
+        slow, fast = self.mock("slow", delay=1.0), self.mock("fast")
+        p = self.provider(slow, fast, hedge=True)
+        # History says the primary normally answers in 50ms and ranks first
+        p.endpoints[0].latencies.extend([0.05] * 20)
+        p.endpoints[1].latencies.extend([0.1] * 20)
+
+        started = time.monotonic()
+        self.assertEqual(p.make_request("eth_getBalance", ["0x0", "latest"])["result"], "fast")
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual(slow.count(), 1)
+
+    def test_hedging_never_duplicates_writes(self):
+        slow, fast = self.mock("slow", delay=0.3), self.mock("fast")
+        p = self.provider(slow, fast, hedge=True)
+        p.endpoints[0].latencies.extend([0.05] * 20)
+        p.endpoints[1].latencies.extend([0.1] * 20)
+
+        self.assertEqual(p.make_request("eth_sendRawTransaction", ["0x00"])["result"], "slow")
+        self.assertEqual(fast.count(), 0)
+
+    def test_token_bucket_rate_limit(self):
+        m = self.mock("a")
+        p = self.provider(m, rate_limit=10)
+        started = time.monotonic()
+        for _ in range(25):
+            p.make_request("eth_getBalance", ["0x0", "latest"])
+        # A burst of 10, then 15 more at 10/s
+        self.assertGreaterEqual(time.monotonic() - started, 1.4)
+        self.assertEqual(m.count(), 25)
+
+    def test_coalesces_identical_inflight_reads(self):
+        m = self.mock("a", delay=0.3)
+        p = self.provider(m)
+        barrier = threading.Barrier(10)
+        results = []
+
+        def call():
+            barrier.wait()
+            results.append(p.make_request("eth_blockNumber", [])["result"])
+
+        threads = [threading.Thread(target=call) for _ in range(10)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(results, ["a"] * 10)
+        self.assertEqual(m.count("eth_blockNumber"), 1)
+
+    def test_send_raw_transaction_not_retried_after_timeout(self):
+        slow, other = self.mock("slow", delay=1.0), self.mock("other")
+        p = self.provider(slow, other, timeout=0.3)
+        with self.assertRaises(requests.Timeout):
+            p.make_request("eth_sendRawTransaction", ["0x00"])
+        self.assertEqual(other.count(), 0)
+
+        # A read that times out does move on to the next endpoint
+        p.endpoints[0].down_until = 0
+        self.assertEqual(p.make_request("eth_getBalance", ["0x0", "latest"])["result"], "other")
+
+
+class StateSyncTests(TestCase):
+    """read_states / sync_states against a mock node answering batched eth_calls."""
+
+    def setUp(self):
+        self.new   = make_property(1)                      # current getters
+        self.old   = make_property(2)                      # only isClosed()
+        self.dead  = make_property(3)                      # every getter reverts
+        self.quiet = make_property(4, returns_pool=Decimal("2"))  # already in sync
+        ether = 10**18
+        self.getters = {
+            self.new.crowdfund_address:   {"closed()": 1, "returnsPool()": 5 * ether, "returnsPerToken()": ether // 10},
+            self.old.crowdfund_address:   {"isClosed()": 1, "returnsPool()": 0, "returnsPerToken()": 0},
+            self.dead.crowdfund_address:  {},
+            # closed() answers first, so isClosed() is ignored
+            self.quiet.crowdfund_address: {"closed()": 0, "isClosed()": 1, "returnsPool()": 2 * ether,
+                                           "returnsPerToken()": 0},
+        }
+        from web3 import Web3
+        self.blocks = set()
+        self.rpc = MockRPC("node", respond=self.respond)
+        self.addCleanup(self.rpc.stop)
+        self.w3 = Web3(ResilientHTTPProvider([self.rpc.url], timeout=5, rate_limit=0, hedge=False))
+
+    def respond(self, method, params):
+        if method == "eth_blockNumber":
+            return hex(100)
+        call, block = params
+        self.blocks.add(block)
+        selectors = {
+            "0x" + function_signature_to_4byte_selector(sig).hex(): value
+            for sig, value in self.getters[call["to"]].items()
+        }
+        if call["data"] not in selectors:
+            raise RPCFault(-32000, "execution reverted")
+        return f"0x{selectors[call['data']]:064x}"
+
+    def test_read_states_matches_batched_replies_by_id(self):
+        props = [self.new, self.old, self.dead, self.quiet]
+        # Small batches, each answered in reverse order by the mock
+        states = read_states(self.w3, props, 42, batch_calls=3)
+        self.assertEqual(states, {
+            self.new.pk:   {"closed": True, "returns_pool": Decimal("5"), "distributed_per": Decimal("0.1")},
+            self.old.pk:   {"closed": True, "returns_pool": 0, "distributed_per": 0},
+            self.dead.pk:  {},
+            self.quiet.pk: {"closed": False, "returns_pool": Decimal("2"), "distributed_per": 0},
+        })
+        self.assertEqual(self.blocks, {hex(42)})  # one consistent snapshot
+        self.assertEqual(self.rpc.count("eth_call"), len(props) * 4)
+
+    def test_sync_states_writes_only_changed_rows(self):
+        with mock.patch.object(Property.objects, "bulk_update", wraps=Property.objects.bulk_update) as bulk:
+            block, changed = sync_states(self.w3)
+        self.assertEqual(block, 100)
+        self.assertEqual({p.pk for p in changed}, {self.new.pk, self.old.pk})
+        bulk.assert_called_once()
+        self.assertEqual({p.pk for p in bulk.call_args.args[0]}, {self.new.pk, self.old.pk})
+        self.assertEqual(bulk.call_args.args[1], ["closed", "distributed_per", "returns_pool"])
+
+        rows = {p.pk: p for p in Property.objects.all()}
+        self.assertTrue(rows[self.new.pk].closed)
+        self.assertEqual(rows[self.new.pk].returns_pool, Decimal("5"))
+        self.assertEqual(rows[self.new.pk].distributed_per, Decimal("0.1"))
+        self.assertTrue(rows[self.old.pk].closed)
+        self.assertFalse(rows[self.quiet.pk].closed)
+        # Every property that answered is stamped; the dead one isn't
+        self.assertEqual(
+            {pk: p.synced_at_block for pk, p in rows.items()},
+            {self.new.pk: 100, self.old.pk: 100, self.dead.pk: None, self.quiet.pk: 100},
+        )
+
+        # Nothing changed since, so nothing is rewritten
+        with mock.patch.object(Property.objects, "bulk_update") as bulk:
+            _, changed = sync_states(self.w3)
+        self.assertEqual(changed, [])
+        bulk.assert_not_called()
+
+    def test_short_batch_reply_raises(self):
+        with mock.patch.object(
+            ResilientHTTPProvider, "make_batch_request", return_value=[{"jsonrpc": "2.0", "id": 0, "result": "0x"}],
+        ):
+            with self.assertRaisesMessage(RuntimeError, "returned 1 of"):
+                read_states(self.w3, [self.new], 42)
+
+
+class ColdStartTests(SimpleTestCase):
+    """Fresh interpreters, so modules imported by other tests don't count."""
+
+    def loaded_after(self, code, *modules):
+        script = (
+            "import os, sys, django\n"
+            "os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'homeshares_backend.settings')\n"
+            "django.setup()\n"
+            f"{code}\n"
+            f"print(','.join(m for m in {list(modules)!r} if m in sys.modules))\n"
+        )
+        out = subprocess.run(
+            [sys.executable, "-c", script], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        return set(filter(None, out.split(",")))
+
+    def test_url_resolution_does_not_import_web3(self):
+        loaded = self.loaded_after(
+            "from django.urls import get_resolver; get_resolver().url_patterns",
+            "web3", "eth_abi", "properties.views",
+        )
+        self.assertEqual(loaded, {"properties.views"})
+
+    def test_preload_does_not_import_views(self):
+        loaded = self.loaded_after(
+            "from blockchain.preload import warm; warm()",
+            "web3", "properties.views", "properties.live", "django.core.handlers.asgi",
+        )
+        self.assertEqual(loaded, {"web3"})
+
+    def test_distribute_command_does_not_import_views(self):
+        loaded = self.loaded_after(
+            "import blockchain.management.commands.distribute_profits",
+            "properties.views",
+        )
+        self.assertEqual(loaded, set())
+
+
+class MockChain:
+    """
+    Just enough of a chain for distribute(): fees, nonces, gas estimates,
+    broadcasts and receipts, with per-crowdfund faults.
+    """
+
+    def __init__(self, base_fee=10**9, nonce=7):
+        self.base_fee    = base_fee  # None = pre-London chain, legacy gasPrice only
+        self.nonce       = nonce
+        self.no_estimate = set()     # crowdfund addresses whose estimate_gas reverts
+        self.reverts     = set()     # crowdfund addresses mined with status 0
+        self.never_mined = set()     # crowdfund addresses that never get a receipt
+        self.reject_send = set()     # crowdfund addresses whose broadcast is rejected
+        self.signed      = {}        # raw tx hex → tx dict, filled by the signer
+        self.broadcast   = []        # tx dicts in broadcast order
+        self.rpc         = MockRPC("chain", respond=self.respond)
+
+    def respond(self, method, params):
+        if method == "eth_chainId":
+            return hex(10143)
+        if method == "eth_getBlockByNumber":
+            block = {"number": "0x64", "hash": "0x" + "11" * 32, "timestamp": "0x1", "transactions": []}
+            if self.base_fee is not None:
+                block["baseFeePerGas"] = hex(self.base_fee)
+            return block
+        if method == "eth_gasPrice":
+            return hex(5 * 10**9)
+        if method == "eth_maxPriorityFeePerGas":
+            return hex(2 * 10**9)
+        if method == "eth_getTransactionCount":
+            return hex(self.nonce)
+        if method == "eth_estimateGas":
+            if params[0]["to"].lower() in self.no_estimate:
+                raise RPCFault(3, "execution reverted: nothing to distribute")
+            return hex(50_000)
+        if method == "eth_sendRawTransaction":
+            tx = self.signed[params[0].removeprefix("0x")]
+            if tx["to"].lower() in self.reject_send:
+                raise RPCFault(-32000, "nonce too low")
+            self.broadcast.append(tx)
+            return "0x" + f"{tx['nonce']:064x}"
+        if method == "eth_getTransactionReceipt":
+            tx = next(t for t in self.broadcast if "0x" + f"{t['nonce']:064x}" == params[0])
+            to = tx["to"].lower()
+            if to in self.never_mined:
+                return None
+            return {
+                "transactionHash": params[0], "transactionIndex": "0x0",
+                "blockHash": "0x" + "22" * 32, "blockNumber": "0x65",
+                "from": tx["from"], "to": tx["to"], "gasUsed": hex(40_000),
+                "cumulativeGasUsed": hex(40_000), "effectiveGasPrice": hex(10**9),
+                "contractAddress": None, "logs": [], "logsBloom": "0x" + "00" * 256,
+                "type": "0x2", "status": "0x0" if to in self.reverts else "0x1",
+            }
+        raise RPCFault(-32601, f"method {method} not supported")
+
+
+class RecordingAccount:
+    """Signs with a real key and tells the mock chain what each raw tx contains."""
+
+    def __init__(self, chain):
+        from eth_account import Account
+        self.chain   = chain
+        self.account = Account.from_key("0x" + "42" * 32)
+        self.address = self.account.address
+
+    def sign_transaction(self, tx):
+        signed = self.account.sign_transaction(tx)
+        self.chain.signed[signed.raw_transaction.hex().removeprefix("0x")] = dict(tx)
+        return signed
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class DistributionTests(TestCase):
+
+    def setUp(self):
+        from web3 import Web3
+        from .abi import load_crowdfund_abi
+        self.chain = MockChain()
+        self.addCleanup(self.chain.rpc.stop)
+        self.w3    = Web3(ResilientHTTPProvider([self.chain.rpc.url], timeout=5))
+        self.acct  = RecordingAccount(self.chain)
+        self.abi   = load_crowdfund_abi()
+
+        investor   = make_investor(1)
+        self.props = [make_property(n) for n in range(1, 5)]
+        for prop in self.props:
+            Investment.objects.create(
+                user=investor, property=prop, amount=Decimal("1"),
+                tx_hash=f"0x{prop.pk:064x}", block_number=prop.pk,
+            )
+
+    def distribute(self, **kwargs):
+        from .distribution import distribute
+        return distribute(self.w3, self.acct, self.props, self.abi, **kwargs)
+
+    def addr(self, prop):
+        return prop.crowdfund_address.lower()
+
+    def distributed(self):
+        return set(Investment.objects.filter(distributed=True).values_list("property_id", flat=True))
+
+    def test_sequential_local_nonces_and_eip1559_fees(self):
+        results = self.distribute()
+
+        self.assertEqual([r["status"] for r in results.values()], ["confirmed"] * 4)
+        self.assertEqual([tx["nonce"] for tx in self.chain.broadcast], [7, 8, 9, 10])
+        for tx in self.chain.broadcast:
+            self.assertNotIn("gasPrice", tx)
+            self.assertEqual(tx["maxPriorityFeePerGas"], 2 * 10**9)
+            self.assertEqual(tx["maxFeePerGas"], 2 * 10**9 + 2 * 10**9)  # 2 × base + tip
+            self.assertEqual(tx["gas"], int(50_000 * 1.2))
+        # Nonce looked up once, not per transaction
+        self.assertEqual(self.chain.rpc.count("eth_getTransactionCount"), 1)
+        self.assertEqual(self.distributed(), {p.pk for p in self.props})
+
+    def test_legacy_gas_price_without_base_fee(self):
+        self.chain.base_fee = None
+        self.distribute()
+        for tx in self.chain.broadcast:
+            self.assertEqual(tx["gasPrice"], 5 * 10**9)
+            self.assertNotIn("maxFeePerGas", tx)
+            self.assertNotIn("maxPriorityFeePerGas", tx)
+
+    def test_failed_estimate_gets_no_nonce(self):
+        self.chain.no_estimate.add(self.addr(self.props[1]))
+        results = self.distribute()
+
+        self.assertEqual(results[self.props[1].pk]["status"], "skipped")
+        self.assertIn("estimate_gas failed", results[self.props[1].pk]["error"])
+        # No hole in the nonce sequence for the skipped property
+        self.assertEqual(
+            [(tx["to"].lower(), tx["nonce"]) for tx in self.chain.broadcast],
+            [(self.addr(p), n) for p, n in zip([self.props[0], *self.props[2:]], [7, 8, 9])],
+        )
+        self.assertNotIn(self.props[1].pk, self.distributed())
+
+    def test_reverted_and_timed_out_stay_undistributed(self):
+        self.chain.reverts.add(self.addr(self.props[0]))
+        self.chain.never_mined.add(self.addr(self.props[2]))
+        results = self.distribute(timeout=1)
+
+        self.assertEqual(
+            {p.pk: results[p.pk]["status"] for p in self.props},
+            {
+                self.props[0].pk: "reverted", self.props[1].pk: "confirmed",
+                self.props[2].pk: "timeout",  self.props[3].pk: "confirmed",
+            },
+        )
+        self.assertEqual(self.distributed(), {self.props[1].pk, self.props[3].pk})
+
+    def test_broadcast_failure_leaves_later_transactions_unsent(self):
+        self.chain.reject_send.add(self.addr(self.props[1]))
+        results = self.distribute()
+
+        self.assertEqual([tx["to"].lower() for tx in self.chain.broadcast], [self.addr(self.props[0])])
+        self.assertEqual(
+            [results[p.pk]["status"] for p in self.props],
+            ["confirmed", "unsent", "unsent", "unsent"],
+        )
+        self.assertEqual(self.distributed(), {self.props[0].pk})
+
+    def test_dry_run_signs_without_broadcasting(self):
+        results = self.distribute(dry_run=True)
+        self.assertEqual({r["status"] for r in results.values()}, {"signed"})
+        self.assertEqual(self.chain.broadcast, [])
+        self.assertEqual(self.distributed(), set())
+
+
+class WalletFilterTests(TestCase):
+
+    def test_topic_chunks_pads_sorts_and_splits(self):
+        chunks = topic_chunks([wallet(3), wallet(1).upper().replace("0X", "0x"), wallet(2)], chunk=2)
+        self.assertEqual(chunks, [
+            [address_topic(wallet(1)), address_topic(wallet(2))],
+            [address_topic(wallet(3))],
+        ])
+        self.assertEqual(address_topic(wallet(1)), "0x" + "0" * 63 + "1")
+
+    def test_refresh_returns_only_new_wallets(self):
+        make_investor(1)
+        filt = WalletFilter()
+        self.assertEqual(filt.refresh(), set())  # first load is the baseline, not "new"
+        self.assertEqual(filt.wallets, {wallet(1)})
+        self.assertEqual(filt.refresh(), set())  # nothing changed
+
+        make_investor(2)
+        User.objects.create(username="no-wallet")  # wallet-less profiles are ignored
+        self.assertEqual(filt.refresh(), {wallet(2)})
+        self.assertEqual(filt.wallets, {wallet(1), wallet(2)})
+
+        # A re-linked wallet counts as new
+        profile = User.objects.get(username="investor1").profile
+        profile.wallet_address = wallet(9).upper().replace("0X", "0x")
+        profile.save()
+        self.assertEqual(filt.refresh(), {wallet(9)})
+        self.assertEqual(filt.wallets, {wallet(9), wallet(2)})
+
+
+class FakeChain:
+    """get_logs over an in-memory list of contribution logs, honouring the investor topic filter."""
+
+    def __init__(self, tip, logs):
+        self.block_number = tip
+        self.logs  = logs
+        self.calls = []
+
+    def get_logs(self, params):
+        investors = params["topics"][1] if len(params["topics"]) > 1 else None
+        self.calls.append((params["fromBlock"], params["toBlock"], investors is not None))
+        return [
+            {**log, "transactionHash": HexBytes(log["transactionHash"])}
+            for log in self.logs
+            if params["fromBlock"] <= log["blockNumber"] <= params["toBlock"]
+            and (investors is None or log["topics"][1] in investors)
+        ]
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class WalletBackfillTests(TestCase):
+
+    def setUp(self):
+        from web3 import Web3
+        self.prop  = make_property()
+        make_investor(1)
+        self.chain = FakeChain(1000, [
+            contribution_log(wallet(1), 10**18, 20),
+            contribution_log(wallet(2), 2 * 10**18, 50),   # before wallet 2 registers
+            contribution_log(wallet(2), 3 * 10**18, 700),
+        ])
+        self.w3 = mock.Mock(eth=self.chain, from_wei=Web3.from_wei)
+
+        self.cmd = poll_listen.Command(stdout=StringIO(), stderr=StringIO())
+        self.cmd.w3        = self.w3
+        self.cmd.leaser    = None
+        self.cmd.wallets   = WalletFilter()
+        self.cmd.wallets.refresh()
+        self.cmd.last_seen = {}
+        self.cmd.backfills = []
+        self.cmd.sink      = InvestmentSink()
+        patcher = mock.patch.object(poll_listen, "BACKFILL_WINDOW", 300)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def round(self, tip):
+        self.chain.block_number = tip
+        self.chain.calls.clear()
+        self.cmd.poll_once()
+        return list(self.chain.calls)
+
+    def amounts(self):
+        return sorted(Investment.objects.values_list("block_number", flat=True))
+
+    def checkpoint(self):
+        return ListenerCheckpoint.objects.get(property=self.prop)
+
+    def test_new_wallet_is_backfilled_a_few_windows_per_round(self):
+        self.round(1000)  # starts watching from the tip
+        old_as_of = self.cmd.wallets.as_of
+
+        make_investor(2)
+        calls = self.round(1010)
+        # Two backfill windows for just the new wallet, then the live poll still runs
+        self.assertEqual(calls, [(0, 299, True), (300, 599, True), (1001, 1010, True)])
+        self.assertEqual(self.amounts(), [50])
+        self.assertEqual(len(self.cmd.backfills), 1)
+        # The backfill isn't finished, so the checkpoint doesn't claim wallet 2 yet
+        self.assertEqual(self.checkpoint().block_number, 1010)
+        self.assertEqual(self.checkpoint().wallets_as_of, old_as_of)
+
+        calls = self.round(1020)
+        self.assertEqual(calls, [(600, 899, True), (900, 1000, True), (1011, 1020, True)])
+        self.assertEqual(self.amounts(), [50, 700])
+        self.assertEqual(self.cmd.backfills, [])
+        self.assertEqual(self.checkpoint().wallets_as_of, self.cmd.wallets.as_of)
+        self.assertGreater(self.cmd.wallets.as_of, old_as_of)
+
+    def test_resuming_a_checkpoint_catches_up_wallets_registered_since(self):
+        # Another worker checkpointed before wallet 2 registered
+        self.round(1000)
+        self.round(1010)
+        make_investor(2)
+
+        successor = poll_listen.Command(stdout=StringIO(), stderr=StringIO())
+        successor.__dict__.update(self.cmd.__dict__, last_seen={}, backfills=[], wallets=WalletFilter())
+        successor.wallets.refresh()
+        self.cmd = successor
+        self.round(1010)
+
+        self.assertEqual(len(self.cmd.backfills), 1)
+        self.assertEqual(self.cmd.backfills[0]["to"], 1010)
@@ -0,0 +1,65 @@
+# homeshares_backend/blockchain/wallets.py
+import os
+from django.db.models import Count, Max
+from users.models import Profile
+
+WALLET_FILTER_CHUNK = int(os.getenv("WALLET_FILTER_CHUNK", "100"))  # addresses per topic[1] OR-list
+
+
+def is_wallet(address):
+    return bool(address) and len(address) == 42 and address.startswith("0x")
+
+
+def address_topic(address):
+    """Left-pad an address to the 32-byte form used for indexed topics."""
+    return "0x" + address.lower()[2:].rjust(64, "0")
+
+
+def topic_chunks(wallets, chunk=WALLET_FILTER_CHUNK):
+    wallets = sorted(wallets)
+    return [
+        [address_topic(w) for w in wallets[i:i + chunk]]
+        for i in range(0, len(wallets), chunk)
+    ]
+
+
+def wallets_changed_since(as_of):
+    return {
+        w.lower()
+        for w in Profile.objects.filter(updated_at__gt=as_of).values_list("wallet_address", flat=True)
+        if is_wallet(w)
+    }
+
+
+class WalletFilter:
+    """
+    The registered Profile wallets, turned into topic[1] OR-filters.
+
+    `refresh()` costs one aggregate query and only reloads the set when a
+    profile was added, edited or removed; it returns the newly added wallets
+    so the caller can backfill their history.
+    """
+
+    def __init__(self, chunk=WALLET_FILTER_CHUNK):
+        self.chunk       = chunk
+        self.wallets     = set()
+        self.as_of       = None
+        self.fingerprint = None
+
+    def refresh(self):
+        stamp = Profile.objects.aggregate(n=Count("id"), as_of=Max("updated_at"))
+        fingerprint = (stamp["n"], stamp["as_of"])
+        if fingerprint == self.fingerprint:
+            return set()
+
+        wallets = {
+            w.lower()
+            for w in Profile.objects.values_list("wallet_address", flat=True)
+            if is_wallet(w)
+        }
+        added = wallets - self.wallets if self.fingerprint is not None else set()
+        self.wallets, self.as_of, self.fingerprint = wallets, stamp["as_of"], fingerprint
+        return added
+
+    def topic_chunks(self):
+        return topic_chunks(self.wallets, self.chunk)
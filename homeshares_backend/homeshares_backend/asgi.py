@@ -2,6 +2,8 @@
 ASGI config for homeshares_backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it (e.g. ``uvicorn homeshares_backend.asgi:application``) to enable the
+live progress stream at ``/properties/live/``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -14,3 +16,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'homeshares_backend.settings')
 
 application = get_asgi_application()
+
+# Optional warm start: load web3 and the crowdfund ABI before workers fork
+from blockchain.preload import PRELOAD_CHAIN, warm  # noqa: E402
+if PRELOAD_CHAIN:
+    warm()
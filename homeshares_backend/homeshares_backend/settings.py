@@ -1,6 +1,7 @@
 from pathlib import Path
 from dotenv import load_dotenv
 import os
+import tempfile
 
 load_dotenv()  # this will pull in .env into os.environ
 
@@ -69,12 +70,77 @@ WSGI_APPLICATION = 'homeshares_backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
+# DB_ENGINE picks the profile:
+#   sqlite   – single node; WAL lets gunicorn workers read while a listener writes
+#   postgres – multi node; persistent connections with health checks (needs psycopg)
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite').lower()
+
+if DB_ENGINE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('DB_NAME', 'homeshares'),
+            'USER': os.getenv('DB_USER', ''),
+            'PASSWORD': os.getenv('DB_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', 'localhost'),
+            'PORT': os.getenv('DB_PORT', '5432'),
+            'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '600')),
+            'CONN_HEALTH_CHECKS': True,
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                # seconds a connection waits on a locked database (SQLite busy_timeout)
+                'timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', '20')),
+                # take the write lock at BEGIN so the busy timeout applies instead of
+                # failing on a read→write lock upgrade
+                'transaction_mode': 'IMMEDIATE',
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                    'PRAGMA temp_store=MEMORY;'
+                ),
+            },
+            # Tests run on a file so they exercise the same WAL / locking profile
+            # (Django's default in-memory test DB has table-level locks instead)
+            'TEST': {
+                'NAME': os.getenv(
+                    'SQLITE_TEST_PATH',
+                    os.path.join(tempfile.gettempdir(), 'homeshares_test.sqlite3'),
+                ),
+            },
+        }
+    }
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# CACHE_BACKEND picks the store for page fragments and version counters:
+#   file   – default; shared by web workers and listener processes on one host
+#   locmem – per process; only when ingestion runs in the serving process
+#   any other value is used as a backend path (e.g. django.core.cache.backends.redis.RedisCache)
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'file')
+CACHE_BACKENDS = {
+    'file':   'django.core.cache.backends.filebased.FileBasedCache',
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+}
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': CACHE_BACKENDS.get(CACHE_BACKEND, CACHE_BACKEND),
+        'LOCATION': os.getenv(
+            'CACHE_LOCATION',
+            os.path.join(tempfile.gettempdir(), 'homeshares_cache') if CACHE_BACKEND == 'file' else '',
+        ),
     }
 }
+if CACHE_BACKEND in CACHE_BACKENDS:
+    # Old fragment versions are never read again; let culling reclaim them
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', '10000'))}
 
 
 # Password validation
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'homeshares_backend.settings')
 
 application = get_wsgi_application()
+
+# Optional warm start: load web3 and the crowdfund ABI before workers fork
+from blockchain.preload import PRELOAD_CHAIN, warm  # noqa: E402
+if PRELOAD_CHAIN:
+    warm()
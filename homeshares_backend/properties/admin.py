@@ -1,5 +1,19 @@
 from django.contrib import admin
+from .cache import bump_properties
 from .models import Property, Investment
 
 admin.site.register(Property)
-admin.site.register(Investment)
+
+
+@admin.register(Investment)
+class InvestmentAdmin(admin.ModelAdmin):
+    # No post_delete receiver for Investment (it would disable fast bulk deletes),
+    # so deletes made here refresh the cards by hand
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        bump_properties([obj.property_id])
+
+    def delete_queryset(self, request, queryset):
+        pks = set(queryset.values_list('property_id', flat=True))
+        super().delete_queryset(request, queryset)
+        bump_properties(pks)
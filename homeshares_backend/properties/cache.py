@@ -0,0 +1,86 @@
+# properties/cache.py
+import hashlib
+import os
+import uuid
+from functools import lru_cache
+from django.core.cache import cache
+from django.db import transaction
+from django.template.loader import get_template
+from blockchain.abi import crowdfund_abi_json
+
+# Versions do the invalidation; the TTL only lets superseded entries expire
+FRAGMENT_TTL = int(os.getenv("FRAGMENT_CACHE_TTL", "86400"))
+
+LIST_VERSION_KEY = "props:list:v"
+CARD_TEMPLATE    = "partials/property_card.html"
+
+
+def _version_key(pk):
+    return f"prop:v:{pk}"
+
+
+def _token():
+    # Random rather than incremented: concurrent bumps from two processes can't
+    # collapse into one value, and an evicted counter never reuses an old key
+    return uuid.uuid4().hex[:12]
+
+
+def ids_key(list_version):
+    return f"props:ids:{list_version}"
+
+
+@lru_cache(maxsize=None)
+def card_fingerprint():
+    """
+    Hash of what a card embeds besides its property: the template and the ABI.
+
+    The cache outlives restarts, so without this a deploy that changes either
+    would keep serving cards rendered by the previous release.
+    """
+    digest = hashlib.sha1(get_template(CARD_TEMPLATE).template.source.encode())
+    digest.update(crowdfund_abi_json().encode())
+    return digest.hexdigest()[:12]
+
+
+def card_key(pk, version):
+    return f"prop:card:{card_fingerprint()}:{pk}:{version}"
+
+
+async def alist_version():
+    version = await cache.aget(LIST_VERSION_KEY)
+    if version is None:
+        await cache.aadd(LIST_VERSION_KEY, _token(), None)
+        version = await cache.aget(LIST_VERSION_KEY)
+    return version
+
+
+async def aproperty_versions(pks):
+    """{pk: version token}, creating tokens for properties seen for the first time."""
+    keys     = {pk: _version_key(pk) for pk in pks}
+    found    = await cache.aget_many(keys.values())
+    missing  = [pk for pk, key in keys.items() if key not in found]
+    if missing:
+        for pk in missing:
+            await cache.aadd(keys[pk], _token(), None)
+        found.update(await cache.aget_many([keys[pk] for pk in missing]))
+    return {pk: found.get(key) for pk, key in keys.items()}
+
+
+def bump_properties(pks, listing=False):
+    """
+    Invalidate the cached cards of `pks` (and the list itself with `listing`).
+
+    Runs once the surrounding transaction commits, so a reader can never cache
+    pre-commit data under the new version.
+    """
+    pks = set(pks)
+    if not pks and not listing:
+        return
+
+    def apply():
+        if pks:
+            cache.set_many({_version_key(pk): _token() for pk in pks}, None)
+        if listing:
+            cache.set(LIST_VERSION_KEY, _token(), None)
+
+    transaction.on_commit(apply)
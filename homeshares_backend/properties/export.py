@@ -0,0 +1,107 @@
+# properties/export.py
+import csv
+import io
+import json
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from .models import Property, Investment
+
+EXPORT_CHUNK = 2000  # rows fetched per DB round-trip and emitted per write
+
+COLUMNS = [
+    'id', 'block_number', 'timestamp', 'tx_hash',
+    'property', 'crowdfund_address', 'username',
+    'amount', 'currency', 'distributed',
+]
+FIELDS = [
+    'id', 'block_number', 'timestamp', 'tx_hash',
+    'property__symbol', 'property__crowdfund_address', 'user__username',
+    'amount', 'currency', 'distributed',
+]
+CONTENT_TYPES = {
+    'csv':   'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+def _time_filter(value, end):
+    # ISO datetime, or a plain date meaning the whole day (inclusive)
+    # (parse_datetime also accepts a bare date as midnight, so try dates first)
+    op  = 'lte' if end else 'gte'
+    day = parse_date(value)
+    if day is not None:
+        return {f'timestamp__date__{op}': day}
+    dt = parse_datetime(value)
+    if dt is None:
+        raise ValueError(f"Invalid date: {value}")
+    if timezone.is_naive(dt):
+        dt = timezone.make_aware(dt)
+    return {f'timestamp__{op}': dt}
+
+
+def export_queryset(prop=None, since=None, until=None, from_block=None, to_block=None,
+                    distributed=None):
+    """Investments joined with property and user, as plain dicts in pk order."""
+    qs = Investment.objects.all()
+    if prop:
+        match = Q(symbol=prop) | Q(crowdfund_address__iexact=prop)
+        if str(prop).isdigit():
+            match |= Q(pk=int(prop))
+        qs = qs.filter(property__in=Property.objects.filter(match))
+    if since:
+        qs = qs.filter(**_time_filter(since, end=False))
+    if until:
+        qs = qs.filter(**_time_filter(until, end=True))
+    if from_block is not None:
+        qs = qs.filter(block_number__gte=from_block)
+    if to_block is not None:
+        qs = qs.filter(block_number__lte=to_block)
+    if distributed is not None:
+        qs = qs.filter(distributed=distributed)
+    # .values() rather than .values_list(): the latter can't be aiterator()'d
+    return qs.order_by('id').values(*FIELDS)
+
+
+def _encode(rows, fmt):
+    rows = [
+        (
+            r['id'], r['block_number'], r['timestamp'].isoformat(), r['tx_hash'],
+            r['property__symbol'], r['property__crowdfund_address'], r['user__username'],
+            f"{r['amount']:f}", r['currency'], r['distributed'],
+        )
+        for r in rows
+    ]
+    if fmt == 'csv':
+        buf = io.StringIO()
+        csv.writer(buf).writerows(rows)
+        return buf.getvalue()
+    return ''.join(json.dumps(dict(zip(COLUMNS, row))) + '\n' for row in rows)
+
+
+def stream_export(qs, fmt):
+    """Text chunks of EXPORT_CHUNK rows each; memory stays flat whatever the row count."""
+    if fmt == 'csv':
+        yield ','.join(COLUMNS) + '\r\n'
+    batch = []
+    for row in qs.iterator(chunk_size=EXPORT_CHUNK):
+        batch.append(row)
+        if len(batch) == EXPORT_CHUNK:
+            yield _encode(batch, fmt)
+            batch = []
+    if batch:
+        yield _encode(batch, fmt)
+
+
+async def astream_export(qs, fmt):
+    """Async twin of stream_export, so ASGI responses don't buffer the whole export."""
+    if fmt == 'csv':
+        yield ','.join(COLUMNS) + '\r\n'
+    batch = []
+    async for row in qs.aiterator(chunk_size=EXPORT_CHUNK):
+        batch.append(row)
+        if len(batch) == EXPORT_CHUNK:
+            yield _encode(batch, fmt)
+            batch = []
+    if batch:
+        yield _encode(batch, fmt)
@@ -0,0 +1,122 @@
+# properties/live.py
+import asyncio
+import logging
+import os
+from django.db.models import Count, Max, Sum
+from .models import Investment
+
+LIVE_POLL_INTERVAL = float(os.getenv("LIVE_POLL_INTERVAL", "2"))  # seconds between DB checks
+LIVE_KEEPALIVE     = float(os.getenv("LIVE_KEEPALIVE", "15"))     # seconds between SSE pings
+
+logger = logging.getLogger(__name__)
+
+
+class Subscriber:
+    """
+    One open browser connection.
+
+    Updates are coalesced per property (latest wins), so a slow client holds
+    at most one pending message per property no matter how much it lags.
+    """
+
+    def __init__(self):
+        self.pending = {}
+        self.ready   = asyncio.Event()
+
+    def push(self, updates):
+        for msg in updates:
+            prev = self.pending.get(msg["id"])
+            if prev is not None:
+                msg = {**msg, "delta": prev["delta"] + msg["delta"], "count": prev["count"] + msg["count"]}
+            self.pending[msg["id"]] = msg
+        self.ready.set()
+
+    async def next(self, timeout):
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        batch, self.pending = list(self.pending.values()), {}
+        self.ready.clear()
+        return batch
+
+
+class ProgressHub:
+    """
+    Shared fan-out of raised-amount deltas to every connected client.
+
+    A single task per process watches the Investment id high-water mark that
+    the listeners' ingestion sink advances on commit, so N open tabs cost one
+    indexed query per tick instead of N RPC polls.
+    """
+
+    def __init__(self, interval=LIVE_POLL_INTERVAL):
+        self.interval = interval
+        self.clients  = set()
+        self.last_id  = None
+        self.task     = None
+
+    def subscribe(self):
+        sub = Subscriber()
+        self.clients.add(sub)
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self.run())
+        return sub
+
+    def unsubscribe(self, sub):
+        self.clients.discard(sub)
+
+    async def run(self):
+        while self.clients:
+            # A failed tick (e.g. database locked by a listener) is retried next
+            # tick; letting it end the task would leave open tabs on pings only
+            try:
+                if self.last_id is None:
+                    agg = await Investment.objects.aaggregate(last=Max("id"))
+                    self.last_id = agg["last"] or 0
+                updates = await self.poll()
+            except Exception:
+                logger.exception("Live progress poll failed, retrying")
+                updates = []
+            if updates:
+                for sub in list(self.clients):
+                    sub.push(updates)
+            await asyncio.sleep(self.interval)
+
+    async def poll(self):
+        # 1) What landed since the last tick, grouped by property
+        new = {
+            row["property"]: row
+            async for row in (
+                Investment.objects
+                .filter(id__gt=self.last_id)
+                .values("property")
+                .annotate(delta=Sum("amount"), count=Count("id"), last=Max("id"))
+            )
+        }
+        if not new:
+            return []
+        self.last_id = max(row["last"] for row in new.values())
+
+        # 2) Fresh totals for just those properties
+        totals = {
+            row["property"]: row["raised"]
+            async for row in (
+                Investment.objects
+                .filter(property__in=list(new))
+                .values("property")
+                .annotate(raised=Sum("amount"))
+            )
+        }
+        return [
+            {
+                "id":     pk,
+                "raised": totals.get(pk) or 0,
+                "delta":  row["delta"],
+                "count":  row["count"],
+            }
+            for pk, row in new.items()
+        ]
+
+
+hub = ProgressHub()
@@ -0,0 +1,54 @@
+# properties/management/commands/export_investments.py
+import time
+from django.core.management.base import BaseCommand, CommandError
+from properties.export import CONTENT_TYPES, export_queryset, stream_export
+
+
+class Command(BaseCommand):
+    help = "Stream investments (joined with property and user) as CSV or JSON Lines"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=sorted(CONTENT_TYPES), default="csv")
+        parser.add_argument("--property", help="Property id, symbol or crowdfund address")
+        parser.add_argument("--since", help="ISO date/datetime (inclusive)")
+        parser.add_argument("--until", help="ISO date/datetime (inclusive)")
+        parser.add_argument("--from-block", type=int)
+        parser.add_argument("--to-block", type=int)
+        parser.add_argument("--distributed", choices=["yes", "no"])
+        parser.add_argument("--output", help="File to write (default: stdout)")
+
+    def handle(self, *args, **options):
+        distributed = {"yes": True, "no": False}.get(options["distributed"])
+        try:
+            qs = export_queryset(
+                prop        = options["property"],
+                since       = options["since"],
+                until       = options["until"],
+                from_block  = options["from_block"],
+                to_block    = options["to_block"],
+                distributed = distributed,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        started = time.monotonic()
+        rows    = 0
+        out     = open(options["output"], "w", newline="") if options["output"] else None
+        try:
+            for chunk in stream_export(qs, options["format"]):
+                rows += chunk.count("\n")
+                if out:
+                    out.write(chunk)
+                else:
+                    self.stdout.write(chunk, ending="")
+        finally:
+            if out:
+                out.close()
+
+        if out:
+            if options["format"] == "csv":
+                rows -= 1  # header
+            elapsed = time.monotonic() - started
+            self.stderr.write(
+                f"✅ Exported {rows} investments to {options['output']} in {elapsed:.1f}s"
+            )
@@ -0,0 +1,89 @@
+# properties/management/commands/loadtest.py
+import threading
+import time
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(len(samples) * pct))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer a running server with concurrent clients and report throughput and latency. "
+        "Run it against `gunicorn homeshares_backend.wsgi` and `uvicorn homeshares_backend.asgi:application` "
+        "with the same worker count to compare the two."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("base_url", help="e.g. http://127.0.0.1:8000")
+        parser.add_argument(
+            "--path", action="append", dest="paths", default=[],
+            help="Path to request, round-robin (repeatable; default: /properties/)",
+        )
+        parser.add_argument("--clients", type=int, default=50, help="Concurrent connections")
+        parser.add_argument("--duration", type=float, default=10, help="Seconds to run")
+        parser.add_argument("--sessionid", help="Session cookie, for login-only pages like /properties/dashboard/")
+
+    def handle(self, *args, **options):
+        base    = options["base_url"].rstrip("/")
+        paths   = options["paths"] or ["/properties/"]
+        clients = options["clients"]
+        try:
+            requests.get(base + paths[0], timeout=10)
+        except requests.RequestException as e:
+            raise CommandError(f"Cannot reach {base}: {e}")
+
+        latencies, errors = [], []
+        lock     = threading.Lock()
+        deadline = time.monotonic() + options["duration"]
+
+        def client(n):
+            session = requests.Session()
+            if options["sessionid"]:
+                session.cookies.set("sessionid", options["sessionid"])
+            i = n
+            while time.monotonic() < deadline:
+                url = base + paths[i % len(paths)]
+                i  += 1
+                started = time.monotonic()
+                try:
+                    resp = session.get(url, timeout=30)
+                    ok   = resp.status_code == 200
+                    err  = None if ok else f"HTTP {resp.status_code}"
+                except requests.RequestException as e:
+                    err = type(e).__name__
+                elapsed = time.monotonic() - started
+                with lock:
+                    if err:
+                        errors.append(err)
+                    else:
+                        latencies.append(elapsed)
+
+        self.stdout.write(f"🔨 {clients} clients → {base} {', '.join(paths)} for {options['duration']:.0f}s")
+        started = time.monotonic()
+        threads = [threading.Thread(target=client, args=(n,), daemon=True) for n in range(clients)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        wall = time.monotonic() - started
+
+        latencies.sort()
+        self.stdout.write(
+            f"✅ {len(latencies)} ok, {len(errors)} failed in {wall:.1f}s "
+            f"→ {len(latencies) / wall:.0f} req/s"
+        )
+        self.stdout.write(
+            f"⏱ p50 {percentile(latencies, 0.50) * 1000:.0f}ms  "
+            f"p95 {percentile(latencies, 0.95) * 1000:.0f}ms  "
+            f"p99 {percentile(latencies, 0.99) * 1000:.0f}ms"
+        )
+        if errors:
+            counts = {}
+            for e in errors:
+                counts[e] = counts.get(e, 0) + 1
+            self.stderr.write("  ❌ " + ", ".join(f"{n}× {e}" for e, n in sorted(counts.items())))
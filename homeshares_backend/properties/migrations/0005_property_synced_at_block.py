@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 14:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0004_property_closed_property_distributed_per_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='synced_at_block',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
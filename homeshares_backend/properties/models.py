@@ -9,6 +9,7 @@ class Property(models.Model):
     closed         = models.BooleanField(default=False)
     returns_pool   = models.DecimalField(max_digits=30, decimal_places=18, default=0)
     distributed_per= models.DecimalField(max_digits=30, decimal_places=18, default=0)
+    synced_at_block= models.BigIntegerField(null=True, blank=True)  # set by sync_crowdfunds
 
 
     def __str__(self):
@@ -0,0 +1,28 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from .cache import bump_properties
+from .models import Property, Investment
+
+# Bulk writes (listener sink, reindex, pending attach) skip these and bump explicitly.
+# Investment has no post_delete receiver (it would make every queryset delete fetch
+# rows one by one), so code deleting investments directly must bump too.
+
+@receiver(post_save, sender=Property)
+def property_saved(sender, instance, created, **kwargs):
+    bump_properties([instance.pk], listing=created)
+
+@receiver(post_delete, sender=Property)
+def property_deleted(sender, instance, **kwargs):
+    bump_properties([instance.pk], listing=True)
+
+@receiver(post_save, sender=Investment)
+def investment_saved(sender, instance, **kwargs):
+    bump_properties([instance.property_id])
+
+@receiver(pre_delete, sender=User)
+def investor_deleting(sender, instance, **kwargs):
+    # Their investments go by cascade, which fires nothing per row; the bump
+    # itself waits for the commit, so collecting the properties up front is safe
+    pks = Investment.objects.filter(user=instance).values_list('property_id', flat=True).distinct()
+    bump_properties(list(pks))
@@ -1,3 +1,350 @@
-from django.test import TestCase
+import asyncio
+import json
+import re
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import OperationalError, connection
+from django.template.loader import render_to_string
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from .export import COLUMNS, export_queryset, stream_export
+from .live import ProgressHub, Subscriber
+from .models import Property, Investment
 
-# Create your tests here.
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def raised(card):
+    return re.search(r'class="raised[^"]*">\s*([\d.]+)', card).group(1)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class AsyncViewTests(TestCase):
+    """properties_list and dashboard run on the async ORM; exercise them through AsyncClient."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user  = User.objects.create(username="alice")
+        cls.other = User.objects.create(username="bob")
+        cls.house = Property.objects.create(
+            name="Lagos House", symbol="LGH", crowdfund_address="0x" + "a" * 40, goal=Decimal("100"),
+        )
+        cls.flat = Property.objects.create(
+            name="Abuja Flat", symbol="ABF", crowdfund_address="0x" + "b" * 40, goal=Decimal("50"),
+        )
+        Investment.objects.bulk_create([
+            Investment(user=cls.user, property=cls.house, amount=Decimal("10"), tx_hash="0x1", block_number=10),
+            Investment(user=cls.user, property=cls.house, amount=Decimal("5"), tx_hash="0x2", block_number=20,
+                       distributed=True),
+            Investment(user=cls.user, property=cls.flat, amount=Decimal("7"), tx_hash="0x3", block_number=30),
+            Investment(user=cls.other, property=cls.flat, amount=Decimal("3"), tx_hash="0x4", block_number=40),
+        ])
+
+    async def test_properties_list(self):
+        r = await self.async_client.get(reverse('properties:list'))
+        self.assertEqual(r.status_code, 200)
+        self.assertTemplateUsed(r, 'properties_list.html')
+
+        cards = r.context['cards']
+        self.assertEqual(len(cards), 2)
+        # Cards come in pk order, each with its summed raise
+        self.assertIn('Lagos House', cards[0])
+        self.assertEqual(raised(cards[0]), '15.00')
+        self.assertIn('Abuja Flat', cards[1])
+        self.assertEqual(raised(cards[1]), '10.00')
+
+    async def test_dashboard_requires_login(self):
+        r = await self.async_client.get(reverse('properties:dashboard'))
+        self.assertEqual(r.status_code, 302)
+
+    async def test_dashboard_counts_and_filter(self):
+        await self.async_client.aforce_login(self.user)
+
+        r = await self.async_client.get(reverse('properties:dashboard'))
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.context['counts'], {'all': 3, 'pending': 2, 'distributed': 1})
+        self.assertEqual(r.context['status'], 'all')
+        # Newest first, only this user's investments
+        self.assertEqual([inv.tx_hash for inv in r.context['investments']], ['0x3', '0x2', '0x1'])
+
+        r = await self.async_client.get(reverse('properties:dashboard'), {'status': 'pending'})
+        self.assertEqual(r.context['status'], 'pending')
+        self.assertEqual([inv.tx_hash for inv in r.context['investments']], ['0x3', '0x1'])
+        self.assertEqual(r.context['counts']['all'], 3)  # counts ignore the filter
+
+    async def test_concurrent_requests(self):
+        # Many overlapping requests on one event loop all complete with the same page
+        await self.async_client.aforce_login(self.user)
+        url = reverse('properties:dashboard')
+        responses = await asyncio.gather(*(self.async_client.get(url) for _ in range(20)))
+        self.assertEqual({r.status_code for r in responses}, {200})
+        self.assertEqual({len(r.context['investments']) for r in responses}, {3})
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class CardCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user  = User.objects.create(username="alice")
+        cls.house = Property.objects.create(
+            name="Lagos House", symbol="LGH", crowdfund_address="0x" + "a" * 40, goal=Decimal("100"),
+        )
+        cls.flat = Property.objects.create(
+            name="Abuja Flat", symbol="ABF", crowdfund_address="0x" + "b" * 40, goal=Decimal("50"),
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    async def get_list(self):
+        # Entering the context opens the connection, which is sync-only
+        queries = CaptureQueriesContext(connection)
+        await sync_to_async(queries.__enter__)()
+        try:
+            r = await self.async_client.get(reverse('properties:list'))
+        finally:
+            await sync_to_async(queries.__exit__)(None, None, None)
+        self.assertEqual(r.status_code, 200)
+        return r.context['cards'], await sync_to_async(len)(queries)
+
+    async def test_warm_hit_makes_no_queries(self):
+        _, cold = await self.get_list()
+        cards, warm = await self.get_list()
+        self.assertGreater(cold, 0)
+        self.assertEqual(warm, 0)
+        self.assertEqual(len(cards), 2)
+
+    async def test_new_investment_rerenders_only_its_card(self):
+        await self.get_list()
+
+        def invest():
+            with self.captureOnCommitCallbacks(execute=True):
+                Investment.objects.create(
+                    user=self.user, property=self.house, amount=Decimal("40"), tx_hash="0x1", block_number=1,
+                )
+        await sync_to_async(invest)()
+
+        with mock.patch('properties.views.render_to_string', wraps=render_to_string) as render:
+            cards, _ = await self.get_list()
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual(raised(cards[0]), '40.00')
+        self.assertEqual(raised(cards[1]), '0.00')
+
+    async def test_deleting_an_investor_rerenders_their_cards(self):
+        def invest():
+            with self.captureOnCommitCallbacks(execute=True):
+                Investment.objects.create(
+                    user=self.user, property=self.house, amount=Decimal("40"), tx_hash="0x1", block_number=1,
+                )
+        await sync_to_async(invest)()
+        cards, _ = await self.get_list()
+        self.assertEqual(raised(cards[0]), '40.00')
+
+        def delete_user():
+            # Investments go by cascade, with no per-row signal
+            with self.captureOnCommitCallbacks(execute=True):
+                User.objects.get(pk=self.user.pk).delete()
+        await sync_to_async(delete_user)()
+
+        with mock.patch('properties.views.render_to_string', wraps=render_to_string) as render:
+            cards, _ = await self.get_list()
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual(raised(cards[0]), '0.00')
+
+    async def test_new_template_or_abi_never_serves_old_cards(self):
+        await self.get_list()
+        _, warm = await self.get_list()
+        self.assertEqual(warm, 0)
+
+        # A deploy that changes the card template or ABI gets a new fingerprint
+        with mock.patch('properties.cache.card_fingerprint', return_value='next-release'):
+            cards, queries = await self.get_list()
+        self.assertGreater(queries, 0)
+        self.assertEqual(len(cards), 2)
+
+    def test_fingerprint_covers_template_and_abi(self):
+        from .cache import card_fingerprint, card_key
+        self.assertIn(card_fingerprint(), card_key(1, 'v'))
+        card_fingerprint.cache_clear()
+        with mock.patch('properties.cache.crowdfund_abi_json', return_value='[]'):
+            changed = card_fingerprint()
+        card_fingerprint.cache_clear()
+        self.assertNotEqual(changed, card_fingerprint())
+
+
+class SubscriberTests(SimpleTestCase):
+
+    async def test_push_merges_updates_per_property(self):
+        sub = Subscriber()
+        sub.push([{"id": 1, "raised": 10, "delta": 10, "count": 1}])
+        sub.push([
+            {"id": 1, "raised": 15, "delta": 5, "count": 2},
+            {"id": 2, "raised": 3, "delta": 3, "count": 1},
+        ])
+        # A lagging client holds one message per property, whatever it missed
+        self.assertEqual(len(sub.pending), 2)
+
+        batch = await sub.next(1)
+        self.assertEqual(
+            sorted(batch, key=lambda m: m["id"]),
+            [
+                {"id": 1, "raised": 15, "delta": 15, "count": 3},
+                {"id": 2, "raised": 3, "delta": 3, "count": 1},
+            ],
+        )
+        self.assertEqual(await sub.next(0.01), [])  # drained
+
+
+class ProgressHubTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user  = User.objects.create(username="alice")
+        cls.house = Property.objects.create(
+            name="Lagos House", symbol="LGH", crowdfund_address="0x" + "a" * 40, goal=Decimal("100"),
+        )
+        cls.flat = Property.objects.create(
+            name="Abuja Flat", symbol="ABF", crowdfund_address="0x" + "b" * 40, goal=Decimal("50"),
+        )
+        Investment.objects.create(
+            user=cls.user, property=cls.house, amount=Decimal("20"), tx_hash="0x0", block_number=1,
+        )
+
+    def invest(self, prop, amount, n):
+        return Investment.objects.create(
+            user=self.user, property=prop, amount=Decimal(amount), tx_hash=f"0x{n}", block_number=n,
+        )
+
+    async def test_poll_reports_deltas_and_totals(self):
+        hub = ProgressHub()
+        hub.last_id = (await Investment.objects.alatest("id")).id
+        await sync_to_async(self.invest)(self.house, "5", 1)
+        await sync_to_async(self.invest)(self.house, "7", 2)
+        await sync_to_async(self.invest)(self.flat, "3", 3)
+
+        updates = sorted(await hub.poll(), key=lambda m: m["id"])
+        self.assertEqual(updates, [
+            {"id": self.house.pk, "raised": Decimal("32"), "delta": Decimal("12"), "count": 2},
+            {"id": self.flat.pk, "raised": Decimal("3"), "delta": Decimal("3"), "count": 1},
+        ])
+        self.assertEqual(await hub.poll(), [])  # nothing new since
+
+    async def test_run_survives_a_failed_poll(self):
+        hub   = ProgressHub(interval=0.01)
+        calls = []
+        update = {"id": self.house.pk, "raised": 1, "delta": 1, "count": 1}
+
+        async def flaky_poll():
+            calls.append(1)
+            if len(calls) == 1:
+                raise OperationalError("database is locked")
+            return [update] if len(calls) == 2 else []
+
+        hub.poll = flaky_poll
+        with self.assertLogs("properties.live", "ERROR"):
+            sub = hub.subscribe()
+            batch = await sub.next(2)
+        hub.unsubscribe(sub)
+        await asyncio.wait_for(hub.task, 1)
+
+        self.assertEqual(batch, [update])
+
+
+class ExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user  = User.objects.create(username="alice")
+        cls.staff = User.objects.create(username="ops", is_staff=True)
+        cls.house = Property.objects.create(
+            name="Lagos House", symbol="LGH", crowdfund_address="0x" + "a" * 40, goal=Decimal("100"),
+        )
+        cls.flat = Property.objects.create(
+            name="Abuja Flat", symbol="ABF", crowdfund_address="0x" + "b" * 40, goal=Decimal("50"),
+        )
+        rows = [
+            # tx_hash, property, block, day, distributed
+            ("0x1", cls.house, 10, 1, False),
+            ("0x2", cls.house, 20, 2, True),
+            ("0x3", cls.flat, 30, 2, False),
+            ("0x4", cls.flat, 40, 3, True),
+        ]
+        for tx, prop, block, day, distributed in rows:
+            inv = Investment.objects.create(
+                user=cls.user, property=prop, amount=Decimal(block) / 4, tx_hash=tx,
+                block_number=block, distributed=distributed,
+            )
+            # timestamp is auto_now_add; pin it afterwards
+            Investment.objects.filter(pk=inv.pk).update(
+                timestamp=datetime(2025, 1, day, 12, tzinfo=dt_timezone.utc),
+            )
+
+    def txs(self, **filters):
+        return [row['tx_hash'] for row in export_queryset(**filters)]
+
+    def test_filters(self):
+        self.assertEqual(self.txs(), ["0x1", "0x2", "0x3", "0x4"])
+        # A property by symbol, address (any case) or pk
+        self.assertEqual(self.txs(prop="LGH"), ["0x1", "0x2"])
+        self.assertEqual(self.txs(prop="0x" + "B" * 40), ["0x3", "0x4"])
+        self.assertEqual(self.txs(prop=str(self.flat.pk)), ["0x3", "0x4"])
+        # Plain dates cover the whole day; datetimes are exact
+        self.assertEqual(self.txs(since="2025-01-02", until="2025-01-02"), ["0x2", "0x3"])
+        self.assertEqual(self.txs(since="2025-01-02T13:00:00"), ["0x4"])
+        self.assertEqual(self.txs(from_block=20, to_block=30), ["0x2", "0x3"])
+        self.assertEqual(self.txs(distributed=True), ["0x2", "0x4"])
+        self.assertEqual(self.txs(distributed=False, prop="ABF"), ["0x3"])
+        with self.assertRaises(ValueError):
+            self.txs(since="last tuesday")
+
+    def test_csv_and_jsonl_output(self):
+        qs = export_queryset(prop="LGH")
+        lines = ''.join(stream_export(qs, 'csv')).splitlines()
+        self.assertEqual(lines[0], ','.join(COLUMNS))
+        self.assertEqual(
+            lines[1],
+            f"{Investment.objects.get(tx_hash='0x1').pk},10,2025-01-01T12:00:00+00:00,0x1,"
+            f"LGH,{'0x' + 'a' * 40},alice,2.500000000000000000,MON,False",
+        )
+        self.assertEqual(len(lines), 3)
+
+        records = [json.loads(line) for line in ''.join(stream_export(qs, 'jsonl')).splitlines()]
+        self.assertEqual([r['tx_hash'] for r in records], ["0x1", "0x2"])
+        self.assertEqual(Decimal(records[1]['amount']), Decimal("5"))
+        self.assertIs(records[1]['distributed'], True)
+        self.assertEqual(set(records[0]), set(COLUMNS))
+
+    def test_streams_in_chunks(self):
+        with mock.patch('properties.export.EXPORT_CHUNK', 3):
+            chunks = list(stream_export(export_queryset(), 'jsonl'))
+        self.assertEqual([c.count('\n') for c in chunks], [3, 1])
+
+    def test_view_is_staff_only(self):
+        url = reverse('properties:export_investments')
+        self.assertEqual(self.client.get(url).status_code, 302)  # anonymous
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(url).status_code, 302)  # logged in, not staff
+
+        self.client.force_login(self.staff)
+        r = self.client.get(url, {'property': 'ABF', 'distributed': 'no', 'format': 'jsonl'})
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r['Content-Type'], 'application/x-ndjson')
+        self.assertIn('investments.jsonl', r['Content-Disposition'])
+        body = b''.join(r.streaming_content).decode()
+        self.assertEqual([json.loads(line)['tx_hash'] for line in body.splitlines()], ["0x3"])
+
+        self.assertEqual(self.client.get(url, {'format': 'xml'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'since': 'soon'}).status_code, 400)
+
+    async def test_async_view_streams_csv(self):
+        await self.async_client.aforce_login(self.staff)
+        r = await self.async_client.get(reverse('properties:export_investments'), {'from_block': 30})
+        self.assertEqual(r.status_code, 200)
+        body = b''.join([chunk async for chunk in r.streaming_content]).decode()
+        self.assertEqual([line.split(',')[3] for line in body.splitlines()[1:]], ["0x3", "0x4"])
@@ -5,8 +5,11 @@ app_name = 'properties'
 
 urlpatterns = [
     path('', views.properties_list, name='list'),
+    path('live/', views.progress_stream, name='progress_stream'),
     path('dashboard/', views.dashboard, name='dashboard'),
     path('owner/', views.owner_console, name='owner_console'),
+    path('owner/distribute/', views.distribute_selected, name='distribute_selected'),
     path('owner/distribute/<int:pk>/', views.distribute_profits, name='distribute_profits'),
+    path('owner/export/', views.export_investments, name='export_investments'),
 
 ]
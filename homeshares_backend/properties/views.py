@@ -1,89 +1,179 @@
 import os
 import json
-from django.conf import settings
+from asgiref.sync import sync_to_async
 from django.contrib.auth.decorators import user_passes_test, login_required
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import redirect, render
+from django.template.loader import render_to_string
 from django.contrib import messages
-from web3 import Web3
+from django.db.models import Count, Q, Sum
+from blockchain.abi import crowdfund_abi_json, load_crowdfund_abi
+from .cache import CARD_TEMPLATE, FRAGMENT_TTL, alist_version, aproperty_versions, card_key, ids_key
 from .models import Property, Investment
+from .export import CONTENT_TYPES, astream_export, export_queryset, stream_export
+from .live import hub, LIVE_KEEPALIVE
 
 def is_owner(user):
     return user.is_superuser
 
-@user_passes_test(is_owner)
-@login_required
-def distribute_profits(request, pk):
-    prop = Property.objects.get(pk=pk)
-
-    rpc = os.getenv("MONAD_RPC_URL")
-    if not rpc:
-        messages.error(request, "⛔ MONAD_RPC_URL not set")
-        return redirect('properties:owner_console')
-    w3 = Web3(Web3.HTTPProvider(rpc))
+def is_staff(user):
+    return user.is_staff
 
+def chain_signer():
+    """(w3, account) for owner transactions, or (None, error message)."""
+    # web3 is heavy; only pay for it in the views that talk to the chain
+    from blockchain.rpc import get_web3, rpc_urls
+    if not rpc_urls():
+        return None, "⛔ MONAD_RPC_URL not set"
     priv = os.getenv("DEPLOYER_PRIVATE_KEY")
     if not priv:
-        messages.error(request, "⛔ DEPLOYER_PRIVATE_KEY not set")
+        return None, "⛔ DEPLOYER_PRIVATE_KEY not set"
+    w3 = get_web3()
+    return (w3, w3.eth.account.from_key(priv)), None
+
+
+async def run_distribution(request, props):
+    from blockchain.distribution import distribute
+    signer, error = chain_signer()
+    if error:
+        messages.error(request, error)
         return redirect('properties:owner_console')
-    acct = w3.eth.account.from_key(priv)
-
-    # load ABI
-    abi_path = settings.BASE_DIR / 'blockchain' / 'abi' / 'PropertyCrowdfund.json'
-    with open(abi_path) as f:
-        data = json.load(f)
-    abi = data.get('abi', data) if isinstance(data, dict) else data
-
-    cf = w3.eth.contract(address=prop.crowdfund_address, abi=abi)
-    nonce = w3.eth.get_transaction_count(acct.address)
-    tx = cf.functions.distributeProfit().build_transaction({
-        'chainId': w3.eth.chain_id,
-        'gas': 500_000,
-        'gasPrice': w3.eth.gas_price,
-        'nonce': nonce,
-    })
-    signed = acct.sign_transaction(tx)
-    tx_hash = w3.eth.send_raw_transaction(signed.raw_transaction)
-    w3.eth.wait_for_transaction_receipt(tx_hash)
+    w3, acct = signer
+
+    # Blocking RPC round-trips and receipt waits; run off the event loop
+    results = await sync_to_async(distribute, thread_sensitive=False)(
+        w3, acct, props, load_crowdfund_abi()
+    )
 
-    Investment.objects.filter(property=prop, distributed=False).update(distributed=True)
-    messages.success(request, "✅ Profits distributed successfully!")
+    done   = [p.symbol for p in props if results[p.pk]['status'] == 'confirmed']
+    failed = [f"{p.symbol} ({results[p.pk]['error']})" for p in props if results[p.pk]['status'] != 'confirmed']
+    if done:
+        messages.success(request, f"✅ Profits distributed for {', '.join(done)}")
+    if failed:
+        messages.error(request, f"⚠️ Not distributed: {'; '.join(failed)}")
     return redirect('properties:owner_console')
 
 
 @user_passes_test(is_owner)
 @login_required
-def owner_console(request):
-    props = Property.objects.all().select_related()
-    toast = request.session.pop('toast', None)
-    return render(request, 'owner_console.html', {'properties': props, 'toast': toast})
+async def distribute_profits(request, pk):
+    prop = await Property.objects.aget(pk=pk)
+    return await run_distribution(request, [prop])
+
 
+@user_passes_test(is_owner)
+@login_required
+async def distribute_selected(request):
+    if request.method != 'POST':
+        return redirect('properties:owner_console')
+    pks = [int(pk) for pk in request.POST.getlist('pk') if pk.isdigit()]
+    props = [p async for p in Property.objects.filter(pk__in=pks).order_by('pk')]
+    if not props:
+        messages.error(request, "⛔ Select at least one property")
+        return redirect('properties:owner_console')
+    return await run_distribution(request, props)
 
-from django.db.models import Sum
 
-def properties_list(request):
+@user_passes_test(is_owner)
+@login_required
+def owner_console(request):
+    # On-chain state comes from sync_crowdfunds; everything renders from one query
     props = Property.objects.annotate(
-        raised_amount=Sum('investment__amount')
-    )
+        raised_amount=Sum('investment__amount'),
+        pending_count=Count('investment', filter=Q(investment__distributed=False)),
+    ).order_by('pk')
+    props = list(props)
+    synced = min((p.synced_at_block or 0 for p in props), default=0)
+    toast = request.session.pop('toast', None)
+    return render(request, 'owner_console.html', {
+        'properties': props, 'synced_at_block': synced, 'toast': toast,
+    })
 
-    # Load ABI
-    with open(settings.BASE_DIR / 'blockchain' / 'abi' / 'PropertyCrowdfund.json') as f:
-        data = json.load(f)
-    abi = data.get('abi', data) if isinstance(data, dict) else data
 
-    return render(request, 'properties_list.html', {
-        'properties': props,
-        'cf_abi_json': json.dumps(abi),
-        'monad_rpc_url':    os.getenv("MONAD_RPC_URL", ""),
+async def arender(request, template_name, context):
+    # Rendering touches the lazy session/user (sync DB access), so do it in a thread
+    return await sync_to_async(render)(request, template_name, context)
+
+
+async def properties_list(request):
+    # Versions are read before any query, so a concurrent ingest commit can
+    # only make what we store here unreachable, never stale
+    list_version = await alist_version()
+    ids = await cache.aget(ids_key(list_version))
+    if ids is None:
+        ids = [row['pk'] async for row in Property.objects.order_by('pk').values('pk').aiterator()]
+        await cache.aset(ids_key(list_version), ids, FRAGMENT_TTL)
+
+    versions = await aproperty_versions(ids)
+    keys  = {pk: card_key(pk, versions[pk]) for pk in ids}
+    cards = await cache.aget_many(keys.values())
+
+    # Re-render only the cards whose property changed since they were cached
+    missing = [pk for pk in ids if keys[pk] not in cards]
+    if missing:
+        fresh = {
+            keys[prop.pk]: render_to_string(CARD_TEMPLATE, {
+                'prop': prop,
+                'cf_abi_json': crowdfund_abi_json(),
+            })
+            async for prop in (
+                Property.objects.filter(pk__in=missing)
+                .annotate(raised_amount=Sum('investment__amount'))
+                .aiterator()
+            )
+        }
+        await cache.aset_many(fresh, FRAGMENT_TTL)
+        cards.update(fresh)
+
+    return await arender(request, 'properties_list.html', {
+        'cards': [cards[keys[pk]] for pk in ids if keys[pk] in cards],
     })
 
 
+async def progress_stream(request):
+    # Server-Sent Events need a long-lived async response; under WSGI tell the
+    # browser's EventSource to stop reconnecting (204) instead of pinning a thread.
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+
+    sub = hub.subscribe()
+
+    async def events():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                batch = await sub.next(LIVE_KEEPALIVE)
+                if not batch:
+                    yield ": ping\n\n"
+                    continue
+                for msg in batch:
+                    yield f"data: {json.dumps(msg, cls=DjangoJSONEncoder)}\n\n"
+        finally:
+            hub.unsubscribe(sub)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @login_required
-def dashboard(request):
+async def dashboard(request):
+    user = await request.auser()
     investments = (
-        request.user.investment_set
+        Investment.objects
+        .filter(user=user)
         .select_related('property')
         .order_by('-block_number')
     )
+    counts = await investments.aaggregate(
+        all=Count('id'),
+        pending=Count('id', filter=Q(distributed=False)),
+        distributed=Count('id', filter=Q(distributed=True)),
+    )
 
     # Filtering by status?
     status = request.GET.get('status')
@@ -92,7 +182,36 @@ def dashboard(request):
     elif status == 'pending':
         investments = investments.filter(distributed=False)
 
-    return render(request, 'dashboard.html', {
-        'investments': investments,
+    return await arender(request, 'dashboard.html', {
+        'investments': [inv async for inv in investments.aiterator()],
+        'counts': counts,
         'status': status or 'all'
     })
+
+
+@user_passes_test(is_staff)
+@login_required
+def export_investments(request):
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in CONTENT_TYPES:
+        return HttpResponseBadRequest(f"Unknown format: {fmt}")
+    try:
+        qs = export_queryset(
+            prop        = request.GET.get('property'),
+            since       = request.GET.get('since'),
+            until       = request.GET.get('until'),
+            from_block  = int(request.GET['from_block']) if request.GET.get('from_block') else None,
+            to_block    = int(request.GET['to_block']) if request.GET.get('to_block') else None,
+            distributed = {'yes': True, 'no': False}.get(request.GET.get('distributed')),
+        )
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+
+    # Under ASGI a sync iterator would be buffered whole; hand it an async one
+    if isinstance(request, ASGIRequest):
+        content = astream_export(qs, fmt)
+    else:
+        content = stream_export(qs, fmt)
+    response = StreamingHttpResponse(content, content_type=CONTENT_TYPES[fmt])
+    response['Content-Disposition'] = f'attachment; filename="investments.{fmt}"'
+    return response
@@ -0,0 +1,148 @@
+# users/management/commands/import_investors.py
+import csv
+import json
+import re
+import time
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models.functions import Lower
+from blockchain.ingest import attach_pending
+from users.models import Profile
+
+WALLET_RE = re.compile(r"^0x[0-9a-f]{40}$")
+
+
+def load_rows(path, fmt):
+    """(line, username, wallet) from a CSV with a header row, or a JSON list of objects."""
+    with open(path, newline="") as f:
+        if fmt == "json":
+            data = json.load(f)
+            if isinstance(data, dict):
+                data = data.get("investors", [])
+            records = enumerate(data, start=1)
+        else:
+            records = enumerate(csv.DictReader(f), start=2)
+        return [
+            (
+                line,
+                (rec.get("username") or "").strip(),
+                (rec.get("wallet") or rec.get("wallet_address") or "").strip(),
+            )
+            for line, rec in records
+        ]
+
+
+class Command(BaseCommand):
+    help = "Bulk-create investor users + profiles from a CSV/JSON of username and wallet"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV (username,wallet header) or JSON list of objects")
+        parser.add_argument("--format", choices=["csv", "json"], help="Default: from the file extension")
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Rows per bulk INSERT transaction")
+        parser.add_argument("--dry-run", action="store_true", help="Validate only, write nothing")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt  = options["format"] or ("json" if path.lower().endswith(".json") else "csv")
+        try:
+            rows = load_rows(path, fmt)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Cannot read {path}: {e}")
+
+        started = time.monotonic()
+        valid, invalid = self.validate(rows)
+        for line, reason in invalid:
+            self.stderr.write(f"  ❌ Row {line}: {reason}")
+
+        # Usernames / wallets already in the DB, each checked with one query per chunk
+        taken_users, taken_wallets = set(), set()
+        chunk_size = options["chunk_size"]
+        for i in range(0, len(valid), chunk_size):
+            chunk = valid[i:i + chunk_size]
+            taken_users.update(
+                User.objects.filter(username__in=[u for _, u, _ in chunk]).values_list("username", flat=True)
+            )
+            taken_wallets.update(
+                Profile.objects
+                .annotate(wallet=Lower("wallet_address"))
+                .filter(wallet__in=[w for _, _, w in chunk])
+                .values_list("wallet", flat=True)
+            )
+
+        new, skipped = [], 0
+        for line, username, wallet in valid:
+            if username in taken_users:
+                skipped += 1
+                if options["verbosity"] > 1:
+                    self.stdout.write(f"  ⏭️ Row {line}: user {username} already exists")
+            elif wallet in taken_wallets:
+                invalid.append((line, f"wallet {wallet} already linked to another user"))
+                self.stderr.write(f"  ❌ Row {line}: wallet {wallet} already linked to another user")
+            else:
+                new.append((username, wallet))
+
+        if options["dry_run"]:
+            self.stdout.write(
+                f"🔍 Dry run: {len(new)} to create, {skipped} existing, {len(invalid)} invalid"
+            )
+            return
+
+        created = attached = 0
+        for i in range(0, len(new), chunk_size):
+            n_users, n_attached = self.create_chunk(new[i:i + chunk_size])
+            created  += n_users
+            attached += n_attached
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f"✅ Imported {created} investors in {elapsed:.1f}s "
+            f"({skipped} existing skipped, {len(invalid)} invalid)"
+        )
+        if attached:
+            self.stdout.write(f"⏳ Attached {attached} previously unmatched contributions")
+
+    def validate(self, rows):
+        # Normalise to lowercase 0x-hex and reject duplicates within the file
+        valid, invalid = [], []
+        seen_users, seen_wallets = set(), set()
+        for line, username, wallet in rows:
+            wallet = wallet.lower()
+            if not username:
+                invalid.append((line, "missing username"))
+            elif len(username) > 150:
+                invalid.append((line, f"username {username[:20]}… is too long"))
+            elif not WALLET_RE.match(wallet):
+                invalid.append((line, f"invalid wallet {wallet!r}"))
+            elif username in seen_users:
+                invalid.append((line, f"duplicate username {username}"))
+            elif wallet in seen_wallets:
+                invalid.append((line, f"duplicate wallet {wallet}"))
+            else:
+                seen_users.add(username)
+                seen_wallets.add(wallet)
+                valid.append((line, username, wallet))
+        return valid, invalid
+
+    def create_chunk(self, chunk):
+        # bulk_create skips post_save, so profiles are inserted here rather than by ensure_profile
+        with transaction.atomic():
+            users = User.objects.bulk_create([
+                User(username=username, password=make_password(None))
+                for username, _ in chunk
+            ])
+            # Backends without RETURNING don't set pks on bulk-created rows
+            if any(u.pk is None for u in users):
+                ids = dict(
+                    User.objects.filter(username__in=[u.username for u in users]).values_list("username", "pk")
+                )
+                for u in users:
+                    u.pk = ids[u.username]
+            Profile.objects.bulk_create([
+                Profile(user=user, wallet_address=wallet)
+                for user, (_, wallet) in zip(users, chunk)
+            ])
+            # No post_save either, so claim parked contributions for the whole chunk here
+            attached = attach_pending({wallet: user for user, (_, wallet) in zip(users, chunk)})
+        return len(users), len(attached)
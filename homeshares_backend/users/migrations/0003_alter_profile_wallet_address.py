@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-19 14:53
+
+from django.db import migrations, models
+
+
+def blank_wallets_to_null(apps, schema_editor):
+    Profile = apps.get_model('users', 'Profile')
+    Profile.objects.filter(wallet_address='').update(wallet_address=None)
+
+
+def null_wallets_to_blank(apps, schema_editor):
+    Profile = apps.get_model('users', 'Profile')
+    Profile.objects.filter(wallet_address=None).update(wallet_address='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_profile_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='profile',
+            name='wallet_address',
+            field=models.CharField(blank=True, max_length=42, null=True, unique=True),
+        ),
+        migrations.RunPython(blank_wallets_to_null, null_wallets_to_blank),
+    ]
@@ -3,7 +3,9 @@ from django.contrib.auth.models import User
 
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
-    wallet_address = models.CharField(max_length=42, unique=True)
+    # NULL until linked, so any number of wallet-less profiles can coexist
+    wallet_address = models.CharField(max_length=42, unique=True, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"{self.user.username} – {self.wallet_address}"
@@ -4,5 +4,7 @@ from django.contrib.auth.models import User
 from .models import Profile
 
 @receiver(post_save, sender=User)
-def ensure_profile(sender, instance, **kwargs):
-    Profile.objects.get_or_create(user=instance)
+def ensure_profile(sender, instance, created, raw=False, **kwargs):
+    # Only brand-new users need a profile; edits and fixture loads don't
+    if created and not raw:
+        Profile.objects.create(user=instance)
@@ -1,3 +1,139 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError, connection, transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from .models import Profile
 
-# Create your tests here.
+
+def wallet(n):
+    return f"0x{n:040x}"
+
+
+class ProfileTests(TestCase):
+
+    def test_profile_created_only_for_new_users(self):
+        user = User.objects.create(username="alice")
+        self.assertTrue(Profile.objects.filter(user=user).exists())
+
+        # Later saves don't try to create a second profile
+        user.first_name = "Alice"
+        user.save()
+        self.assertEqual(Profile.objects.filter(user=user).count(), 1)
+
+    def test_wallet_less_profiles_coexist(self):
+        for name in ("alice", "bob", "carol"):
+            User.objects.create(username=name)
+        self.assertEqual(Profile.objects.filter(wallet_address=None).count(), 3)
+
+        alice = Profile.objects.get(user__username="alice")
+        alice.wallet_address = wallet(1)
+        alice.save()
+        bob = Profile.objects.get(user__username="bob")
+        bob.wallet_address = wallet(1)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            bob.save()
+
+
+class ImportInvestorsTests(TestCase):
+
+    def write(self, content, suffix=".csv"):
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def csv(self, *rows):
+        return self.write("username,wallet\n" + "".join(f"{u},{w}\n" for u, w in rows))
+
+    def run_import(self, path, *args):
+        out, err = StringIO(), StringIO()
+        call_command("import_investors", path, *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def wallets(self):
+        return dict(
+            Profile.objects.exclude(wallet_address=None).values_list("user__username", "wallet_address")
+        )
+
+    def test_validates_and_lowercases(self):
+        path = self.csv(
+            ("alice", "0x" + "AB" * 20),
+            ("", wallet(2)),
+            ("bob", "0x123"),
+            ("carol", "not-a-wallet"),
+            ("x" * 151, wallet(3)),
+            ("dave", wallet(4)),
+        )
+        out, err = self.run_import(path)
+
+        self.assertEqual(self.wallets(), {"alice": "0x" + "ab" * 20, "dave": wallet(4)})
+        self.assertIn("Row 3: missing username", err)
+        self.assertIn("Row 4: invalid wallet '0x123'", err)
+        self.assertIn("Row 5: invalid wallet", err)
+        self.assertIn("Row 6: username", err)
+        self.assertIn("Imported 2 investors", out)
+        self.assertIn("4 invalid", out)
+        # Users come in unusable-password, one profile each (no ensure_profile duplicate)
+        self.assertFalse(User.objects.get(username="alice").has_usable_password())
+        self.assertEqual(Profile.objects.count(), 2)
+
+    def test_json_input(self):
+        path = self.write(json.dumps({"investors": [
+            {"username": "alice", "wallet": wallet(1)},
+            {"username": "bob", "wallet_address": wallet(2)},
+        ]}), suffix=".json")
+        self.run_import(path)
+        self.assertEqual(self.wallets(), {"alice": wallet(1), "bob": wallet(2)})
+
+    def test_duplicates_in_file(self):
+        path = self.csv(
+            ("alice", wallet(1)),
+            ("alice", wallet(2)),
+            ("bob", wallet(1).upper().replace("0X", "0x")),
+        )
+        _, err = self.run_import(path)
+        self.assertEqual(self.wallets(), {"alice": wallet(1)})
+        self.assertIn("Row 3: duplicate username alice", err)
+        self.assertIn(f"Row 4: duplicate wallet {wallet(1)}", err)
+
+    def test_duplicates_in_db(self):
+        User.objects.create(username="alice")
+        carol = User.objects.create(username="carol")
+        carol.profile.wallet_address = "0x" + "CD" * 20  # stored before wallets were normalised
+        carol.profile.save()
+
+        path = self.csv(("alice", wallet(1)), ("bob", "0x" + "cd" * 20), ("dave", wallet(4)))
+        out, err = self.run_import(path, "--verbosity", "2")
+
+        self.assertEqual(sorted(User.objects.values_list("username", flat=True)), ["alice", "carol", "dave"])
+        self.assertEqual(self.wallets(), {"carol": "0x" + "CD" * 20, "dave": wallet(4)})
+        self.assertIn("user alice already exists", out)
+        self.assertIn("already linked to another user", err)
+        self.assertIn("1 existing skipped, 1 invalid", out)
+
+    def test_bulk_creates_per_chunk(self):
+        path = self.csv(*((f"user{n}", wallet(n)) for n in range(5)))
+        with CaptureQueriesContext(connection) as queries:
+            self.run_import(path, "--chunk-size", "2")
+
+        inserts = [q["sql"] for q in queries if q["sql"].startswith("INSERT")]
+        self.assertEqual(sum('"auth_user"' in sql for sql in inserts), 3)
+        self.assertEqual(sum('"users_profile"' in sql for sql in inserts), 3)
+        self.assertEqual(len(self.wallets()), 5)
+
+    def test_dry_run_writes_nothing(self):
+        path = self.csv(("alice", wallet(1)), ("bob", "nope"))
+        out, _ = self.run_import(path, "--dry-run")
+        self.assertIn("1 to create, 0 existing, 1 invalid", out)
+        self.assertFalse(User.objects.exists())
+
+    def test_unreadable_file(self):
+        with self.assertRaises(CommandError):
+            self.run_import(self.write("[not json", suffix=".json"))